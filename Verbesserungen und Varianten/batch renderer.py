@@ -0,0 +1,292 @@
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from collections import namedtuple
+
+# Render without a window. Only plain Surfaces are used, so no display is needed.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+pygame.init()
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    def __init__(self, players_turn):
+        self.state = [[0, 0, 0],
+                      [0, 0, 0],
+                      [0, 0, 0]]
+        self.players_turn = players_turn
+        self.move_count = 0
+        
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        
+    def undo_move(self, row, column):
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.move_count -= 1
+        
+    def did_someone_win(self):
+        for i in range(3):
+            # Horizontal
+            if self.state[i][0] == self.state[i][1] == self.state[i][2] != 0:
+                return True
+            # Vertical
+            if self.state[0][i] == self.state[1][i] == self.state[2][i] != 0:
+                return True     
+        
+        # Diagonal
+        if self.state[0][0] == self.state[1][1] == self.state[2][2] != 0:
+            return True
+        if self.state[0][2] == self.state[1][1] == self.state[2][0] != 0:
+            return True
+        
+        return False
+        
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+    
+    def find_legal_moves(self):
+        legal_moves = []
+        for row in range(3):
+            for column in range(3):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        return legal_moves
+                
+    def board_full(self):
+        return self.move_count == 9
+
+
+class GamePainter:
+    
+    def __init__(self, win_size):
+        self.SQUARE_SIZE = win_size // 3
+        self.GRID_THICKNESS = win_size // 100
+        self.CIRCLE_THICKNESS = win_size // 35
+        self.CIRCLE_RADIUS = self.SQUARE_SIZE // 2.4
+        self.CROSS_THICKNESS = win_size // 27
+        self.CROSS_SIZE = self.SQUARE_SIZE // 3
+        
+    def draw_grid(self, screen):
+        for row in range(3):
+            for column in range(3):
+                x = column * self.SQUARE_SIZE
+                y = row * self.SQUARE_SIZE
+                pygame.draw.rect(screen, (0, 0, 0), 
+                                 (x, y, self.SQUARE_SIZE, self.SQUARE_SIZE), self.GRID_THICKNESS)
+                
+    def draw_game_state(self, screen, game_state):
+        for row in range(3):
+            for column in range(3):
+                piece = game_state[row][column]
+                if piece == Game.CIRCLE:
+                    self.draw_circle(screen, row, column)
+                elif piece == Game.CROSS:
+                    self.draw_cross(screen, row, column)
+                    
+    def draw_circle(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        pygame.draw.circle(screen, (0, 0, 255), (x, y), self.CIRCLE_RADIUS, self.CIRCLE_THICKNESS)
+        
+    def draw_cross(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        left_x = x - self.CROSS_SIZE
+        right_x = x + self.CROSS_SIZE
+        top_y = y - self.CROSS_SIZE
+        bottom_y = y + self.CROSS_SIZE
+        pygame.draw.line(screen, (255, 0, 0), (left_x, top_y), (right_x, bottom_y), self.CROSS_THICKNESS)
+        pygame.draw.line(screen, (255, 0, 0), (right_x, top_y), (left_x, bottom_y), self.CROSS_THICKNESS)
+        
+    def get_square_center_pos(self, row, column):
+        x = column * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        y = row * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        return (x, y)
+        
+    def mouse_to_grid_pos(self, mouse_x, mouse_y):
+        row = mouse_y // self.SQUARE_SIZE
+        row = min(row, 2)
+        column = mouse_x // self.SQUARE_SIZE
+        column = min(column, 2)
+        return (row, column)
+
+
+class CachedGamePainter(GamePainter):
+    
+    # Background, grid and pieces are drawn once. A frame is only a few blits of these surfaces.
+    def __init__(self, win_size):
+        super().__init__(win_size)
+        self.size = win_size
+        self.background = pygame.Surface((win_size, win_size))
+        self.background.fill((255, 255, 255))
+        self.grid = pygame.Surface((win_size, win_size), pygame.SRCALPHA)
+        self.draw_grid(self.grid)
+        self.piece_surfaces = {Game.CIRCLE: self.render_piece(self.draw_circle),
+                               Game.CROSS: self.render_piece(self.draw_cross)}
+        
+    def render_piece(self, draw_piece):
+        # The piece is drawn into the top left square, which has the size of a piece surface.
+        piece_surface = pygame.Surface((self.SQUARE_SIZE, self.SQUARE_SIZE), pygame.SRCALPHA)
+        draw_piece(piece_surface, 0, 0)
+        return piece_surface
+    
+    def render(self, surface, game_state):
+        surface.blit(self.background, (0, 0))
+        for row in range(3):
+            for column in range(3):
+                piece = game_state[row][column]
+                if piece != 0:
+                    surface.blit(self.piece_surfaces[piece], (column * self.SQUARE_SIZE, row * self.SQUARE_SIZE))
+        surface.blit(self.grid, (0, 0))
+
+
+# Game record file format:
+# The file starts with FILE_MAGIC and is followed by records that are only ever appended.
+# Every record is a RECORD_HEADER followed by one byte per move (row * 3 + column).
+# Header fields: engine id, flags, result, move count,
+# total computer thinking time and longest computer move in microseconds.
+FILE_MAGIC = b"TTTR\x01"
+RECORD_HEADER = struct.Struct("<BBBBII")
+
+ENGINE_MINIMAX = 0
+ENGINE_ALPHA_BETA = 1
+ENGINE_NEGAMAX = 2
+ENGINE_ALPHA_BETA_NEGAMAX = 3
+
+FLAG_PLAYER_STARTED = 1
+
+RESULT_DRAW = 0
+RESULT_CIRCLE_WON = Game.CIRCLE
+RESULT_CROSS_WON = Game.CROSS
+RESULT_UNFINISHED = 3
+
+GameRecord = namedtuple("GameRecord", ["engine_id", "flags", "result", "moves", "think_time", "longest_think_time"])
+
+
+def read_game_records_mmap(path):
+    with open(path, "rb") as file:
+        # An empty file can not be mapped and has no magic either.
+        if os.fstat(file.fileno()).st_size < len(FILE_MAGIC):
+            raise ValueError(f"{path} is not a game record file")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if buffer[:len(FILE_MAGIC)] != FILE_MAGIC:
+                raise ValueError(f"{path} is not a game record file")
+            offset = len(FILE_MAGIC)
+            end = len(buffer)
+            while offset + RECORD_HEADER.size <= end:
+                engine_id, flags, result, move_count, think_time, longest_think_time = RECORD_HEADER.unpack_from(buffer, offset)
+                offset += RECORD_HEADER.size
+                if offset + move_count > end:
+                    return
+                moves = buffer[offset:offset + move_count]
+                offset += move_count
+                yield GameRecord(engine_id, flags, result, moves, think_time, longest_think_time)
+
+def replay_game(record):
+    game = Game(bool(record.flags & FLAG_PLAYER_STARTED))
+    for move in record.moves:
+        row, column = divmod(move, 3)
+        if move >= 9 or not game.is_move_legal(row, column) or game.did_someone_win():
+            raise ValueError(f"Illegal move {move} in game record")
+        game.make_move(row, column)
+        yield game
+
+def generate_random_records(game_count, seed):
+    # Games with random moves for when there is no game archive.
+    move_random = random.Random(seed)
+    for game_number in range(game_count):
+        players_turn = move_random.random() < 0.5
+        game = Game(players_turn)
+        moves = bytearray()
+        while not game.did_someone_win() and not game.board_full():
+            move_row, move_column = move_random.choice(game.find_legal_moves())
+            game.make_move(move_row, move_column)
+            moves.append(move_row * 3 + move_column)
+        if game.did_someone_win():
+            # The player who made the last move won.
+            result = Game.CROSS if game.players_turn else Game.CIRCLE
+        else:
+            result = RESULT_DRAW
+        flags = FLAG_PLAYER_STARTED if players_turn else 0
+        yield GameRecord(ENGINE_MINIMAX, flags, result, bytes(moves), 0, 0)
+
+def render_thumbnails(records, directory, size):
+    # One PNG of the final position of every game. Returns the number of frames and of corrupt records,
+    # which are skipped.
+    os.makedirs(directory, exist_ok=True)
+    painter = CachedGamePainter(size)
+    surface = pygame.Surface((size, size))
+    frame_count = 0
+    corrupt_count = 0
+    for game_number, record in enumerate(records):
+        game = Game(bool(record.flags & FLAG_PLAYER_STARTED))
+        try:
+            for game in replay_game(record):
+                pass
+        except ValueError:
+            corrupt_count += 1
+            continue
+        painter.render(surface, game.state)
+        pygame.image.save(surface, os.path.join(directory, f"game_{game_number:06d}.png"))
+        frame_count += 1
+    return frame_count, corrupt_count
+
+def render_replays(records, directory, size):
+    # Every position of every game as one PNG per frame, for example for
+    # "ffmpeg -i replays/game_000000_%d.png game_000000.mp4".
+    # Corrupt records are skipped, the frames of a game are only written once the whole game replayed.
+    os.makedirs(directory, exist_ok=True)
+    painter = CachedGamePainter(size)
+    surface = pygame.Surface((size, size))
+    frame_count = 0
+    corrupt_count = 0
+    for game_number, record in enumerate(records):
+        game = Game(bool(record.flags & FLAG_PLAYER_STARTED))
+        states = [[row[:] for row in game.state]]
+        try:
+            for game in replay_game(record):
+                states.append([row[:] for row in game.state])
+        except ValueError:
+            corrupt_count += 1
+            continue
+        for frame_number, game_state in enumerate(states):
+            painter.render(surface, game_state)
+            pygame.image.save(surface, os.path.join(directory, f"game_{game_number:06d}_{frame_number}.png"))
+        frame_count += len(states)
+    return frame_count, corrupt_count
+
+def iterate_records():
+    # Every pass reads the records again, so that they never all have to be in memory.
+    if os.path.exists(RECORD_PATH):
+        return read_game_records_mmap(RECORD_PATH)
+    return generate_random_records(RANDOM_GAME_COUNT, 0)
+
+
+# Usage: batch renderer.py [game record file]
+RECORD_PATH = sys.argv[1] if len(sys.argv) > 1 else "games.ttt"
+RANDOM_GAME_COUNT = 1000
+THUMBNAIL_SIZE = 128
+THUMBNAIL_DIRECTORY = "thumbnails"
+REPLAY_SIZE = 300
+REPLAY_DIRECTORY = "replays"
+
+start_time = time.perf_counter()
+frame_count, corrupt_count = render_thumbnails(iterate_records(), THUMBNAIL_DIRECTORY, THUMBNAIL_SIZE)
+elapsed = time.perf_counter() - start_time
+print("Games: ", frame_count + corrupt_count, " Corrupt: ", corrupt_count)
+print(f"Thumbnails: {frame_count} frames, {frame_count / elapsed:.0f} frames per second")
+
+start_time = time.perf_counter()
+frame_count, corrupt_count = render_replays(iterate_records(), REPLAY_DIRECTORY, REPLAY_SIZE)
+elapsed = time.perf_counter() - start_time
+print(f"Replays: {frame_count} frames, {frame_count / elapsed:.0f} frames per second")
+
+pygame.quit()
@@ -0,0 +1,263 @@
+import os
+import random
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+# A position is encoded as a base 3 number with one digit per square (row * 3 + column).
+# The side to move is added as one more digit so that equal boards with different players to move differ.
+POWERS_OF_THREE = [3 ** square for square in range(9)]
+TURN_OFFSET = 3 ** 9
+CODE_COUNT = 2 * TURN_OFFSET
+
+# The 8 symmetries of the board as square permutations: symmetry[square] is the square it is moved to.
+def rotate_square(square):
+    row, column = divmod(square, 3)
+    return column * 3 + 2 - row
+
+def mirror_square(square):
+    row, column = divmod(square, 3)
+    return row * 3 + 2 - column
+
+SYMMETRIES = []
+for mirrored in (False, True):
+    symmetry = [mirror_square(square) if mirrored else square for square in range(9)]
+    for rotation in range(4):
+        SYMMETRIES.append(symmetry)
+        symmetry = [rotate_square(target) for target in symmetry]
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    def __init__(self, players_turn):
+        self.state = [[0, 0, 0],
+                      [0, 0, 0],
+                      [0, 0, 0]]
+        self.players_turn = players_turn
+        self.move_count = 0
+        self.code = TURN_OFFSET if players_turn else 0
+        
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.code += piece * POWERS_OF_THREE[row * 3 + column] + (-TURN_OFFSET if self.players_turn else TURN_OFFSET)
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        
+    def undo_move(self, row, column):
+        piece = self.state[row][column]
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.code -= piece * POWERS_OF_THREE[row * 3 + column] + (-TURN_OFFSET if self.players_turn else TURN_OFFSET)
+        self.move_count -= 1
+        
+    def did_someone_win(self):
+        for i in range(3):
+            # Horizontal
+            if self.state[i][0] == self.state[i][1] == self.state[i][2] != 0:
+                return True
+            # Vertical
+            if self.state[0][i] == self.state[1][i] == self.state[2][i] != 0:
+                return True     
+        
+        # Diagonal
+        if self.state[0][0] == self.state[1][1] == self.state[2][2] != 0:
+            return True
+        if self.state[0][2] == self.state[1][1] == self.state[2][0] != 0:
+            return True
+        
+        return False
+        
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+    
+    def find_legal_moves(self):
+        legal_moves = []
+        for row in range(3):
+            for column in range(3):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        return legal_moves
+                
+    def board_full(self):
+        return self.move_count == 9
+
+
+def game_from_code(code):
+    game = Game(code >= TURN_OFFSET)
+    for square in range(9):
+        piece = code // POWERS_OF_THREE[square] % 3
+        if piece != 0:
+            game.state[square // 3][square % 3] = piece
+            game.move_count += 1
+    game.code = code
+    return game
+
+def canonical_code(code):
+    turn = code - code % TURN_OFFSET
+    canonical = None
+    for symmetry in SYMMETRIES:
+        symmetric_code = turn
+        for square in range(9):
+            piece = code // POWERS_OF_THREE[square] % 3
+            symmetric_code += piece * POWERS_OF_THREE[symmetry[square]]
+        if canonical is None or symmetric_code < canonical:
+            canonical = symmetric_code
+    return canonical
+
+def find_exhaustive_codes():
+    # All positions that can be reached from the empty board, no matter who starts.
+    codes = set()
+    
+    def visit(game):
+        if game.code in codes or game.did_someone_win() or game.board_full():
+            return
+        codes.add(game.code)
+        for move_row, move_column in game.find_legal_moves():
+            game.make_move(move_row, move_column)
+            visit(game)
+            game.undo_move(move_row, move_column)
+    
+    visit(Game(True))
+    visit(Game(False))
+    return codes
+
+def find_self_play_codes(game_count, seed):
+    # Positions of random games. Every game has its own seed so that a resumed run plays the same games.
+    codes = set()
+    for game_number in range(game_count):
+        move_random = random.Random(seed + game_number)
+        game = Game(move_random.random() < 0.5)
+        while not game.did_someone_win() and not game.board_full():
+            codes.add(game.code)
+            move_row, move_column = move_random.choice(game.find_legal_moves())
+            game.make_move(move_row, move_column)
+    return codes
+
+def minimax(game, alpha, beta, depth):
+    global best_move, searched_leaf_nodes
+    if game.did_someone_win():
+        searched_leaf_nodes += 1
+        # Current player lost because the other player made the last move.
+        # Add move count to the evaluation because late losses are better than early losses.
+        return -100 + game.move_count
+    if game.board_full():
+        searched_leaf_nodes += 1
+        # Board is filled but no player won: Draw.
+        return 0
+    max_value = -float("inf")
+    legal_moves = game.find_legal_moves()
+    for move_row, move_column in legal_moves:
+        game.make_move(move_row, move_column)
+        value = -minimax(game, -beta, -alpha, depth+1)
+        game.undo_move(move_row, move_column)
+        if value > max_value:
+            max_value = value
+            if depth == 0:
+                best_move = (move_row, move_column)
+        if value > alpha:
+            alpha = value
+        if value >= beta:
+            break
+    return max_value
+
+
+# Every row of a shard: the 9 squares, the piece to move, the value for the player to move and the best square.
+ROW_SIZE = 12
+
+def label_positions(codes):
+    global best_move, searched_leaf_nodes
+    rows = np.zeros((len(codes), ROW_SIZE), dtype=np.int8)
+    for index, code in enumerate(codes):
+        game = game_from_code(code)
+        best_move = None
+        searched_leaf_nodes = 0
+        evaluation = minimax(game, float("-inf"), float("inf"), 0)
+        best_row, best_column = best_move
+        rows[index, :9] = [game.state[row][column] for row in range(3) for column in range(3)]
+        rows[index, 9] = Game.CIRCLE if game.players_turn else Game.CROSS
+        rows[index, 10] = evaluation
+        rows[index, 11] = best_row * 3 + best_column
+    return rows
+
+def codes_of_rows(rows):
+    return rows[:, :9].astype(np.int64) @ np.array(POWERS_OF_THREE) + (rows[:, 9] == Game.CIRCLE) * TURN_OFFSET
+
+def shard_path(directory, shard_index):
+    return os.path.join(directory, f"shard_{shard_index:05d}.npy")
+
+def load_written_codes(directory, shard_size):
+    # Returns the codes of all positions in existing shards, the index of the next shard and the rows of
+    # a last shard that is not full yet. That shard is written again with the new rows appended.
+    written_codes = set()
+    shard_index = 0
+    last_rows = np.zeros((0, ROW_SIZE), dtype=np.int8)
+    while os.path.exists(shard_path(directory, shard_index)):
+        rows = np.load(shard_path(directory, shard_index), mmap_mode="r")
+        written_codes.update(codes_of_rows(rows).tolist())
+        if len(rows) < shard_size:
+            last_rows = np.array(rows)
+            break
+        shard_index += 1
+    return written_codes, shard_index, last_rows
+
+def write_shard(directory, shard_index, rows):
+    # Write to a temporary file first so that an interrupted run never leaves a broken shard behind.
+    path = shard_path(directory, shard_index)
+    shard = np.lib.format.open_memmap(path + ".tmp", mode="w+", dtype=np.int8, shape=rows.shape)
+    shard[:] = rows
+    shard.flush()
+    del shard
+    os.replace(path + ".tmp", path)
+
+def generate_dataset(codes, directory, shard_size, chunk_size, workers):
+    os.makedirs(directory, exist_ok=True)
+    written_codes, shard_index, last_rows = load_written_codes(directory, shard_size)
+    # Only one position of every symmetry class is labeled.
+    canonical_codes = sorted({canonical_code(code) for code in codes} - written_codes)
+    print("Positions in existing shards: ", len(written_codes))
+    print("Positions to label: ", len(canonical_codes))
+    chunks = [canonical_codes[start:start + chunk_size] for start in range(0, len(canonical_codes), chunk_size)]
+    pending_rows = [last_rows]
+    pending_count = len(last_rows)
+    labeled_count = 0
+    start_time = time.perf_counter()
+    with Pool(workers) as pool:
+        for rows in pool.imap(label_positions, chunks):
+            pending_rows.append(rows)
+            pending_count += len(rows)
+            labeled_count += len(rows)
+            while pending_count >= shard_size:
+                rows = np.concatenate(pending_rows)
+                write_shard(directory, shard_index, rows[:shard_size])
+                elapsed = time.perf_counter() - start_time
+                print(f"Shard {shard_index} written, {labeled_count / elapsed:.0f} positions per second")
+                shard_index += 1
+                pending_rows = [rows[shard_size:]]
+                pending_count -= shard_size
+    if pending_count:
+        # Only the last shard can be smaller than the shard size.
+        write_shard(directory, shard_index, np.concatenate(pending_rows))
+    elapsed = time.perf_counter() - start_time
+    print("Labeled positions: ", labeled_count)
+    if elapsed > 0:
+        print("Positions per second: ", labeled_count / elapsed)
+
+
+OUTPUT_DIRECTORY = "dataset"
+SELF_PLAY = False
+SELF_PLAY_GAMES = 10000
+SELF_PLAY_SEED = 0
+SHARD_SIZE = 1024
+CHUNK_SIZE = 32
+WORKERS = os.cpu_count()
+
+if __name__ == "__main__":
+    if SELF_PLAY:
+        codes = find_self_play_codes(SELF_PLAY_GAMES, SELF_PLAY_SEED)
+    else:
+        codes = find_exhaustive_codes()
+    generate_dataset(codes, OUTPUT_DIRECTORY, SHARD_SIZE, CHUNK_SIZE, WORKERS)
@@ -0,0 +1,427 @@
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+import pygame
+pygame.init()
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    def __init__(self, players_turn):
+        self.state = [[0, 0, 0],
+                      [0, 0, 0],
+                      [0, 0, 0]]
+        self.players_turn = players_turn
+        self.move_count = 0
+        self.recorder = None
+        
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        if self.recorder is not None:
+            self.recorder.record_move(row, column)
+        
+    def undo_move(self, row, column):
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.move_count -= 1
+        
+    def did_someone_win(self):
+        for i in range(3):
+            # Horizontal
+            if self.state[i][0] == self.state[i][1] == self.state[i][2] != 0:
+                return True
+            # Vertical
+            if self.state[0][i] == self.state[1][i] == self.state[2][i] != 0:
+                return True     
+        
+        # Diagonal
+        if self.state[0][0] == self.state[1][1] == self.state[2][2] != 0:
+            return True
+        if self.state[0][2] == self.state[1][1] == self.state[2][0] != 0:
+            return True
+        
+        return False
+        
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+    
+    def find_legal_moves(self):
+        legal_moves = []
+        for row in range(3):
+            for column in range(3):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        return legal_moves
+                
+    def board_full(self):
+        return self.move_count == 9
+
+
+class GamePainter:
+    
+    def __init__(self, win_size):
+        self.SQUARE_SIZE = win_size // 3
+        self.GRID_THICKNESS = win_size // 100
+        self.CIRCLE_THICKNESS = win_size // 35
+        self.CIRCLE_RADIUS = self.SQUARE_SIZE // 2.4
+        self.CROSS_THICKNESS = win_size // 27
+        self.CROSS_SIZE = self.SQUARE_SIZE // 3
+        
+    def draw_grid(self, screen):
+        for row in range(3):
+            for column in range(3):
+                x = column * self.SQUARE_SIZE
+                y = row * self.SQUARE_SIZE
+                pygame.draw.rect(screen, (0, 0, 0), 
+                                 (x, y, self.SQUARE_SIZE, self.SQUARE_SIZE), self.GRID_THICKNESS)
+                
+    def draw_game_state(self, screen, game_state):
+        for row in range(3):
+            for column in range(3):
+                piece = game_state[row][column]
+                if piece == Game.CIRCLE:
+                    self.draw_circle(screen, row, column)
+                elif piece == Game.CROSS:
+                    self.draw_cross(screen, row, column)
+                    
+    def draw_circle(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        pygame.draw.circle(screen, (0, 0, 255), (x, y), self.CIRCLE_RADIUS, self.CIRCLE_THICKNESS)
+        
+    def draw_cross(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        left_x = x - self.CROSS_SIZE
+        right_x = x + self.CROSS_SIZE
+        top_y = y - self.CROSS_SIZE
+        bottom_y = y + self.CROSS_SIZE
+        pygame.draw.line(screen, (255, 0, 0), (left_x, top_y), (right_x, bottom_y), self.CROSS_THICKNESS)
+        pygame.draw.line(screen, (255, 0, 0), (right_x, top_y), (left_x, bottom_y), self.CROSS_THICKNESS)
+        
+    def get_square_center_pos(self, row, column):
+        x = column * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        y = row * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        return (x, y)
+        
+    def mouse_to_grid_pos(self, mouse_x, mouse_y):
+        row = mouse_y // self.SQUARE_SIZE
+        row = min(row, 2)
+        column = mouse_x // self.SQUARE_SIZE
+        column = min(column, 2)
+        return (row, column)
+
+
+def make_computer_move(game):
+    global best_move, searched_leaf_nodes
+    best_move = None
+    searched_leaf_nodes = 0
+    # The search calls make_move for every node, so it must not reach the recorder.
+    recorder = game.recorder
+    game.recorder = None
+    start_time = time.perf_counter()
+    evaluation = maximize(game, 0)
+    think_time = time.perf_counter() - start_time
+    game.recorder = recorder
+    if recorder is not None:
+        recorder.add_think_time(think_time)
+    best_row, best_column = best_move
+    game.make_move(best_row, best_column)
+    print("Evaluation: ", evaluation)
+    print("Searched leaf nodes: ", searched_leaf_nodes)
+    print()
+    # Intercept inputs that happened while the computer was thinking.
+    pygame.event.get()
+
+def maximize(game, depth):
+    global best_move, searched_leaf_nodes
+    if game.did_someone_win():
+        searched_leaf_nodes += 1
+        # Minimizing player made the last move and won. Therefore the maximizing player lost.
+        # Add move count to the evaluation because late losses are better than early losses.
+        return -100 + game.move_count
+    if game.board_full():
+        searched_leaf_nodes += 1
+        # Board is filled but no player won: Draw.
+        return 0
+    max_value = -float("inf")
+    legal_moves = game.find_legal_moves()
+    for move_row, move_column in legal_moves:
+        game.make_move(move_row, move_column)
+        value = minimize(game, depth+1)
+        game.undo_move(move_row, move_column)
+        if value > max_value:
+            max_value = value
+            if depth == 0:
+                best_move = (move_row, move_column)
+    return max_value
+
+def minimize(game, depth):
+    global searched_leaf_nodes
+    if game.did_someone_win():
+        searched_leaf_nodes += 1
+        # Maximizing player made the last move and won.
+        # Subtract move count from the evaluation because early wins are better than late wins.
+        return 100 - game.move_count
+    if game.board_full():
+        searched_leaf_nodes += 1
+        # Board is filled but no player won: Draw.
+        return 0
+    min_value = float("inf")
+    legal_moves = game.find_legal_moves()
+    for move_row, move_column in legal_moves:
+        game.make_move(move_row, move_column)
+        value = maximize(game, depth+1)
+        game.undo_move(move_row, move_column)
+        if value < min_value:
+            min_value = value
+    return min_value
+
+
+# Game record file format:
+# The file starts with FILE_MAGIC and is followed by records that are only ever appended.
+# Every record is a RECORD_HEADER followed by one byte per move (row * 3 + column).
+# Header fields: engine id, flags, result, move count,
+# total computer thinking time and longest computer move in microseconds.
+FILE_MAGIC = b"TTTR\x01"
+RECORD_HEADER = struct.Struct("<BBBBII")
+
+ENGINE_MINIMAX = 0
+ENGINE_ALPHA_BETA = 1
+ENGINE_NEGAMAX = 2
+ENGINE_ALPHA_BETA_NEGAMAX = 3
+
+FLAG_PLAYER_STARTED = 1
+
+RESULT_DRAW = 0
+RESULT_CIRCLE_WON = Game.CIRCLE
+RESULT_CROSS_WON = Game.CROSS
+RESULT_UNFINISHED = 3
+
+GameRecord = namedtuple("GameRecord", ["engine_id", "flags", "result", "moves", "think_time", "longest_think_time"])
+
+
+class GameRecordWriter:
+    
+    def __init__(self, path, engine_id):
+        self.file = open(path, "a+b")
+        self.file.seek(0)
+        magic = self.file.read(len(FILE_MAGIC))
+        if magic != FILE_MAGIC[:len(magic)]:
+            self.file.close()
+            raise ValueError(f"{path} is not a game record file")
+        if magic != FILE_MAGIC:
+            # Empty, or a crash happened while the magic was written.
+            self.file.truncate(0)
+            self.file.write(FILE_MAGIC)
+        else:
+            # Cut off a record that a crash left truncated, otherwise the new records would be misread.
+            end = self.file.tell()
+            for record in read_records(self.file):
+                end = self.file.tell()
+            self.file.truncate(end)
+        self.engine_id = engine_id
+        self.begin_game(False)
+        
+    def begin_game(self, players_turn):
+        self.flags = FLAG_PLAYER_STARTED if players_turn else 0
+        self.moves = bytearray()
+        self.think_time = 0
+        self.longest_think_time = 0
+        
+    def record_move(self, row, column):
+        self.moves.append(row * 3 + column)
+        
+    def add_think_time(self, seconds):
+        microseconds = round(seconds * 1_000_000)
+        self.think_time += microseconds
+        self.longest_think_time = max(self.longest_think_time, microseconds)
+        
+    def end_game(self, game):
+        result = game_result(game)
+        header = RECORD_HEADER.pack(self.engine_id, self.flags, result, len(self.moves),
+                                    min(self.think_time, 0xFFFFFFFF), min(self.longest_think_time, 0xFFFFFFFF))
+        # One write per record. A crash can leave a truncated record at the end of the file,
+        # which is cut off when the file is opened for writing again.
+        self.file.write(header + self.moves)
+        self.file.flush()
+        
+    def close(self):
+        self.file.close()
+
+
+def game_result(game):
+    if game.did_someone_win():
+        # The player who made the last move won.
+        return Game.CROSS if game.players_turn else Game.CIRCLE
+    if game.board_full():
+        return RESULT_DRAW
+    return RESULT_UNFINISHED
+
+def read_records(file):
+    # Reads the records from the current position up to the end or a truncated record.
+    while True:
+        header = file.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return
+        engine_id, flags, result, move_count, think_time, longest_think_time = RECORD_HEADER.unpack(header)
+        moves = file.read(move_count)
+        if len(moves) < move_count:
+            return
+        yield GameRecord(engine_id, flags, result, moves, think_time, longest_think_time)
+
+def read_game_records(path):
+    with open(path, "rb") as file:
+        if file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{path} is not a game record file")
+        yield from read_records(file)
+
+def read_game_records_mmap(path):
+    with open(path, "rb") as file:
+        # An empty file can not be mapped and has no magic either.
+        if os.fstat(file.fileno()).st_size < len(FILE_MAGIC):
+            raise ValueError(f"{path} is not a game record file")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if buffer[:len(FILE_MAGIC)] != FILE_MAGIC:
+                raise ValueError(f"{path} is not a game record file")
+            offset = len(FILE_MAGIC)
+            end = len(buffer)
+            while offset + RECORD_HEADER.size <= end:
+                engine_id, flags, result, move_count, think_time, longest_think_time = RECORD_HEADER.unpack_from(buffer, offset)
+                offset += RECORD_HEADER.size
+                if offset + move_count > end:
+                    return
+                moves = buffer[offset:offset + move_count]
+                offset += move_count
+                yield GameRecord(engine_id, flags, result, moves, think_time, longest_think_time)
+
+def replay_game(record):
+    game = Game(bool(record.flags & FLAG_PLAYER_STARTED))
+    for move in record.moves:
+        row, column = divmod(move, 3)
+        if move >= 9 or not game.is_move_legal(row, column) or game.did_someone_win():
+            raise ValueError(f"Illegal move {move} in game record")
+        game.make_move(row, column)
+        yield game
+
+def game_record_statistics(records):
+    statistics = {"games": 0, "moves": 0, "think_time": 0, "corrupt": 0,
+                  RESULT_DRAW: 0, RESULT_CIRCLE_WON: 0, RESULT_CROSS_WON: 0, RESULT_UNFINISHED: 0}
+    for record in records:
+        statistics["games"] += 1
+        statistics["moves"] += len(record.moves)
+        statistics["think_time"] += record.think_time
+        game = Game(bool(record.flags & FLAG_PLAYER_STARTED))
+        try:
+            for game in replay_game(record):
+                pass
+        except ValueError:
+            statistics["corrupt"] += 1
+            continue
+        # The result in the header has to be the result of the replayed game.
+        if record.result != game_result(game):
+            statistics["corrupt"] += 1
+            continue
+        statistics[record.result] += 1
+    return statistics
+
+
+WIN_SIZE = 600
+
+screen = pygame.display.set_mode((WIN_SIZE, WIN_SIZE))
+pygame.display.set_caption("Tic-Tac-Toe")
+
+FPS = 30
+clock = pygame.time.Clock()
+
+painter = GamePainter(WIN_SIZE)
+game = Game(False)
+
+RECORD_PATH = "games.ttt"
+record_writer = GameRecordWriter(RECORD_PATH, ENGINE_MINIMAX)
+record_writer.begin_game(game.players_turn)
+game.recorder = record_writer
+
+game_over = False
+
+if not game.players_turn:
+    # Draw the board so that the window is not black while the computer is thinking.
+    screen.fill((255, 255, 255))
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    pygame.display.update()
+    
+    # Make the first computer move
+    make_computer_move(game)
+
+run = True
+while run:
+    clock.tick(FPS)
+    
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            run = False
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button != 1:
+                continue
+            
+            if game_over:
+                continue
+            
+            mouse_x, mouse_y = event.pos
+            row, column = painter.mouse_to_grid_pos(mouse_x, mouse_y)
+            if not game.is_move_legal(row, column):
+                continue
+            
+            game.make_move(row, column)
+            
+            if game.did_someone_win():
+                print("Player won!")
+                game_over = True
+                record_writer.end_game(game)
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                record_writer.end_game(game)
+                continue
+            
+            make_computer_move(game)
+            
+            if game.did_someone_win():
+                print("Computer won!")
+                game_over = True
+                record_writer.end_game(game)
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                record_writer.end_game(game)
+                continue
+            
+    screen.fill((255, 255, 255))
+    
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    
+    pygame.display.update()
+    
+pygame.display.quit()
+
+if not game_over:
+    record_writer.end_game(game)
+record_writer.close()
+
+statistics = game_record_statistics(read_game_records_mmap(RECORD_PATH))
+print("Recorded games: ", statistics["games"])
+print("Circle won: ", statistics[RESULT_CIRCLE_WON])
+print("Cross won: ", statistics[RESULT_CROSS_WON])
+print("Draws: ", statistics[RESULT_DRAW])
+print("Unfinished: ", statistics[RESULT_UNFINISHED])
+print("Corrupt: ", statistics["corrupt"])
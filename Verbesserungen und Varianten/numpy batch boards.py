@@ -0,0 +1,300 @@
+import time
+
+import numpy as np
+import pygame
+pygame.init()
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    def __init__(self, players_turn):
+        self.state = [[0, 0, 0],
+                      [0, 0, 0],
+                      [0, 0, 0]]
+        self.players_turn = players_turn
+        self.move_count = 0
+        
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        
+    def undo_move(self, row, column):
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.move_count -= 1
+        
+    def did_someone_win(self):
+        for i in range(3):
+            # Horizontal
+            if self.state[i][0] == self.state[i][1] == self.state[i][2] != 0:
+                return True
+            # Vertical
+            if self.state[0][i] == self.state[1][i] == self.state[2][i] != 0:
+                return True     
+        
+        # Diagonal
+        if self.state[0][0] == self.state[1][1] == self.state[2][2] != 0:
+            return True
+        if self.state[0][2] == self.state[1][1] == self.state[2][0] != 0:
+            return True
+        
+        return False
+        
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+    
+    def find_legal_moves(self):
+        legal_moves = []
+        for row in range(3):
+            for column in range(3):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        return legal_moves
+                
+    def board_full(self):
+        return self.move_count == 9
+
+
+class GamePainter:
+    
+    def __init__(self, win_size):
+        self.SQUARE_SIZE = win_size // 3
+        self.GRID_THICKNESS = win_size // 100
+        self.CIRCLE_THICKNESS = win_size // 35
+        self.CIRCLE_RADIUS = self.SQUARE_SIZE // 2.4
+        self.CROSS_THICKNESS = win_size // 27
+        self.CROSS_SIZE = self.SQUARE_SIZE // 3
+        
+    def draw_grid(self, screen):
+        for row in range(3):
+            for column in range(3):
+                x = column * self.SQUARE_SIZE
+                y = row * self.SQUARE_SIZE
+                pygame.draw.rect(screen, (0, 0, 0), 
+                                 (x, y, self.SQUARE_SIZE, self.SQUARE_SIZE), self.GRID_THICKNESS)
+                
+    def draw_game_state(self, screen, game_state):
+        for row in range(3):
+            for column in range(3):
+                piece = game_state[row][column]
+                if piece == Game.CIRCLE:
+                    self.draw_circle(screen, row, column)
+                elif piece == Game.CROSS:
+                    self.draw_cross(screen, row, column)
+                    
+    def draw_circle(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        pygame.draw.circle(screen, (0, 0, 255), (x, y), self.CIRCLE_RADIUS, self.CIRCLE_THICKNESS)
+        
+    def draw_cross(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        left_x = x - self.CROSS_SIZE
+        right_x = x + self.CROSS_SIZE
+        top_y = y - self.CROSS_SIZE
+        bottom_y = y + self.CROSS_SIZE
+        pygame.draw.line(screen, (255, 0, 0), (left_x, top_y), (right_x, bottom_y), self.CROSS_THICKNESS)
+        pygame.draw.line(screen, (255, 0, 0), (right_x, top_y), (left_x, bottom_y), self.CROSS_THICKNESS)
+        
+    def get_square_center_pos(self, row, column):
+        x = column * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        y = row * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        return (x, y)
+        
+    def mouse_to_grid_pos(self, mouse_x, mouse_y):
+        row = mouse_y // self.SQUARE_SIZE
+        row = min(row, 2)
+        column = mouse_x // self.SQUARE_SIZE
+        column = min(column, 2)
+        return (row, column)
+
+
+# Batches of boards are int8 arrays of shape (n, 9) with the square row * 3 + column,
+# together with a bool array of shape (n,) that says whether it is the player's turn.
+WIN_LINES = np.array([[0, 1, 2], [3, 4, 5], [6, 7, 8],
+                      [0, 3, 6], [1, 4, 7], [2, 5, 8],
+                      [0, 4, 8], [2, 4, 6]])
+POWERS_OF_THREE = 3 ** np.arange(9)
+TURN_OFFSET = 3 ** 9
+
+def batch_winners(boards):
+    # Returns the winning piece for every board or 0.
+    lines = boards[:, WIN_LINES]
+    won = (lines[:, :, 0] != 0) & (lines[:, :, 0] == lines[:, :, 1]) & (lines[:, :, 1] == lines[:, :, 2])
+    # Only one player can own a line in a legal position, so the first won line decides.
+    winning_line = won.argmax(axis=1)
+    winners = lines[np.arange(len(boards)), winning_line, 0]
+    return np.where(won.any(axis=1), winners, 0)
+
+def batch_legal_move_masks(boards):
+    return (boards == 0) & (batch_winners(boards) == 0)[:, np.newaxis]
+
+def batch_codes(boards, players_turn):
+    return boards.astype(np.int64) @ POWERS_OF_THREE + players_turn * TURN_OFFSET
+
+def batch_successors(boards, players_turn):
+    # Returns the boards after every legal move, in the order of the parents and their moves,
+    # together with the index of the parent and the square of the move.
+    parents, squares = np.nonzero(batch_legal_move_masks(boards))
+    successors = boards[parents]
+    successors[np.arange(len(parents)), squares] = np.where(players_turn[parents], Game.CIRCLE, Game.CROSS)
+    return successors, ~players_turn[parents], parents, squares
+
+def expand_game_tree(boards, players_turn, unique_positions):
+    # Expands the boards level by level until no moves are left. Every level contains the
+    # boards with one more move. Without unique_positions the levels hold the full game tree,
+    # with it every position appears once and the levels are sorted by position code.
+    levels = []
+    while len(boards):
+        if unique_positions:
+            _, first_indices = np.unique(batch_codes(boards, players_turn), return_index=True)
+            boards = boards[first_indices]
+            players_turn = players_turn[first_indices]
+        levels.append((boards, players_turn))
+        boards, players_turn = batch_successors(boards, players_turn)[:2]
+    return levels
+
+def solve_game_tree(levels):
+    # Solves unique levels from the last to the first. Returns the position codes,
+    # the values for the player to move and the best square (-1 for finished games) of every level.
+    solved_levels = []
+    next_codes = next_values = None
+    for boards, players_turn in reversed(levels):
+        move_count = np.count_nonzero(boards, axis=1)
+        winners = batch_winners(boards)
+        # Current player lost because the other player made the last move.
+        # Add move count to the evaluation because late losses are better than early losses.
+        # Boards that are filled but no player won are draws.
+        values = np.where(winners != 0, -100 + move_count, 0).astype(np.int16)
+        best_squares = np.full(len(boards), -1, dtype=np.int8)
+        successors, successors_turn, parents, squares = batch_successors(boards, players_turn)
+        if len(parents):
+            successor_values = -next_values[np.searchsorted(next_codes, batch_codes(successors, successors_turn))]
+            # Sort the moves of every parent by value, the stable sort keeps the first of equal moves in front.
+            order = np.lexsort((-successor_values, parents))
+            group_starts = np.flatnonzero(np.r_[True, parents[order][1:] != parents[order][:-1]])
+            best = order[group_starts]
+            values[parents[best]] = successor_values[best]
+            best_squares[parents[best]] = squares[best]
+        next_codes = batch_codes(boards, players_turn)
+        next_values = values
+        solved_levels.append((next_codes, values, best_squares))
+    solved_levels.reverse()
+    return solved_levels
+
+def game_tree_statistics(levels):
+    for move_count, (boards, players_turn) in enumerate(levels):
+        winners = batch_winners(boards)
+        draws = np.count_nonzero((winners == 0) & np.all(boards != 0, axis=1))
+        print(f"Moves: {move_count}  Boards: {len(boards)}  "
+              f"Circle won: {np.count_nonzero(winners == Game.CIRCLE)}  "
+              f"Cross won: {np.count_nonzero(winners == Game.CROSS)}  Draws: {draws}")
+
+def make_computer_move(game):
+    code = sum(game.state[row][column] * 3 ** (row * 3 + column) for row in range(3) for column in range(3))
+    code += TURN_OFFSET if game.players_turn else 0
+    index = np.searchsorted(solved_codes, code)
+    evaluation = solved_values[index]
+    best_row, best_column = divmod(int(solved_best_squares[index]), 3)
+    game.make_move(best_row, best_column)
+    print("Evaluation: ", evaluation)
+    print()
+    # Intercept inputs that happened while the computer was thinking.
+    pygame.event.get()
+
+
+WIN_SIZE = 600
+
+screen = pygame.display.set_mode((WIN_SIZE, WIN_SIZE))
+pygame.display.set_caption("Tic-Tac-Toe")
+
+FPS = 30
+clock = pygame.time.Clock()
+
+painter = GamePainter(WIN_SIZE)
+
+# Both players can start.
+empty_boards = np.zeros((2, 9), dtype=np.int8)
+start_players_turn = np.array([True, False])
+
+start_time = time.perf_counter()
+game_tree = expand_game_tree(empty_boards, start_players_turn, False)
+print("Game tree expanded in: ", time.perf_counter() - start_time)
+game_tree_statistics(game_tree)
+print()
+
+start_time = time.perf_counter()
+solved_levels = solve_game_tree(expand_game_tree(empty_boards, start_players_turn, True))
+solved_codes = np.concatenate([codes for codes, values, best_squares in solved_levels])
+order = np.argsort(solved_codes)
+solved_codes = solved_codes[order]
+solved_values = np.concatenate([values for codes, values, best_squares in solved_levels])[order]
+solved_best_squares = np.concatenate([best_squares for codes, values, best_squares in solved_levels])[order]
+print("Positions solved in: ", time.perf_counter() - start_time)
+print()
+game = Game(False)
+
+game_over = False
+
+if not game.players_turn:
+    # Draw the board so that the window is not black while the computer is thinking.
+    screen.fill((255, 255, 255))
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    pygame.display.update()
+    
+    # Make the first computer move
+    make_computer_move(game)
+
+run = True
+while run:
+    clock.tick(FPS)
+    
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            run = False
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button != 1:
+                continue
+            
+            if game_over:
+                continue
+            
+            mouse_x, mouse_y = event.pos
+            row, column = painter.mouse_to_grid_pos(mouse_x, mouse_y)
+            if not game.is_move_legal(row, column):
+                continue
+            
+            game.make_move(row, column)
+            
+            if game.did_someone_win():
+                print("Player won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+            make_computer_move(game)
+            
+            if game.did_someone_win():
+                print("Computer won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+    screen.fill((255, 255, 255))
+    
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    
+    pygame.display.update()
+    
+pygame.display.quit()
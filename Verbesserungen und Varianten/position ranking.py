@@ -0,0 +1,328 @@
+from array import array
+
+import pygame
+pygame.init()
+
+# A position is encoded as a base 3 number with one digit per square (row * 3 + column).
+# The side to move is added as one more digit so that equal boards with different players to move differ.
+POWERS_OF_THREE = [3 ** square for square in range(9)]
+TURN_OFFSET = 3 ** 9
+CODE_COUNT = 2 * TURN_OFFSET
+
+# The 8 symmetries of the board as square permutations: symmetry[square] is the square it is moved to.
+def rotate_square(square):
+    row, column = divmod(square, 3)
+    return column * 3 + 2 - row
+
+def mirror_square(square):
+    row, column = divmod(square, 3)
+    return row * 3 + 2 - column
+
+SYMMETRIES = []
+for mirrored in (False, True):
+    symmetry = [mirror_square(square) if mirrored else square for square in range(9)]
+    for rotation in range(4):
+        SYMMETRIES.append(symmetry)
+        symmetry = [rotate_square(target) for target in symmetry]
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    def __init__(self, players_turn):
+        self.state = [[0, 0, 0],
+                      [0, 0, 0],
+                      [0, 0, 0]]
+        self.players_turn = players_turn
+        self.move_count = 0
+        self.code = TURN_OFFSET if players_turn else 0
+        
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.code += piece * POWERS_OF_THREE[row * 3 + column] + (-TURN_OFFSET if self.players_turn else TURN_OFFSET)
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        
+    def undo_move(self, row, column):
+        piece = self.state[row][column]
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.code -= piece * POWERS_OF_THREE[row * 3 + column] + (-TURN_OFFSET if self.players_turn else TURN_OFFSET)
+        self.move_count -= 1
+        
+    def did_someone_win(self):
+        for i in range(3):
+            # Horizontal
+            if self.state[i][0] == self.state[i][1] == self.state[i][2] != 0:
+                return True
+            # Vertical
+            if self.state[0][i] == self.state[1][i] == self.state[2][i] != 0:
+                return True     
+        
+        # Diagonal
+        if self.state[0][0] == self.state[1][1] == self.state[2][2] != 0:
+            return True
+        if self.state[0][2] == self.state[1][1] == self.state[2][0] != 0:
+            return True
+        
+        return False
+        
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+    
+    def find_legal_moves(self):
+        legal_moves = []
+        for row in range(3):
+            for column in range(3):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        return legal_moves
+                
+    def board_full(self):
+        return self.move_count == 9
+
+
+class GamePainter:
+    
+    def __init__(self, win_size):
+        self.SQUARE_SIZE = win_size // 3
+        self.GRID_THICKNESS = win_size // 100
+        self.CIRCLE_THICKNESS = win_size // 35
+        self.CIRCLE_RADIUS = self.SQUARE_SIZE // 2.4
+        self.CROSS_THICKNESS = win_size // 27
+        self.CROSS_SIZE = self.SQUARE_SIZE // 3
+        
+    def draw_grid(self, screen):
+        for row in range(3):
+            for column in range(3):
+                x = column * self.SQUARE_SIZE
+                y = row * self.SQUARE_SIZE
+                pygame.draw.rect(screen, (0, 0, 0), 
+                                 (x, y, self.SQUARE_SIZE, self.SQUARE_SIZE), self.GRID_THICKNESS)
+                
+    def draw_game_state(self, screen, game_state):
+        for row in range(3):
+            for column in range(3):
+                piece = game_state[row][column]
+                if piece == Game.CIRCLE:
+                    self.draw_circle(screen, row, column)
+                elif piece == Game.CROSS:
+                    self.draw_cross(screen, row, column)
+                    
+    def draw_circle(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        pygame.draw.circle(screen, (0, 0, 255), (x, y), self.CIRCLE_RADIUS, self.CIRCLE_THICKNESS)
+        
+    def draw_cross(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        left_x = x - self.CROSS_SIZE
+        right_x = x + self.CROSS_SIZE
+        top_y = y - self.CROSS_SIZE
+        bottom_y = y + self.CROSS_SIZE
+        pygame.draw.line(screen, (255, 0, 0), (left_x, top_y), (right_x, bottom_y), self.CROSS_THICKNESS)
+        pygame.draw.line(screen, (255, 0, 0), (right_x, top_y), (left_x, bottom_y), self.CROSS_THICKNESS)
+        
+    def get_square_center_pos(self, row, column):
+        x = column * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        y = row * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        return (x, y)
+        
+    def mouse_to_grid_pos(self, mouse_x, mouse_y):
+        row = mouse_y // self.SQUARE_SIZE
+        row = min(row, 2)
+        column = mouse_x // self.SQUARE_SIZE
+        column = min(column, 2)
+        return (row, column)
+
+
+def game_from_code(code):
+    game = Game(code >= TURN_OFFSET)
+    for square in range(9):
+        piece = code // POWERS_OF_THREE[square] % 3
+        if piece != 0:
+            game.state[square // 3][square % 3] = piece
+            game.move_count += 1
+    game.code = code
+    return game
+
+def canonical_code(code):
+    turn = code - code % TURN_OFFSET
+    canonical = None
+    for symmetry in SYMMETRIES:
+        symmetric_code = turn
+        for square in range(9):
+            piece = code // POWERS_OF_THREE[square] % 3
+            symmetric_code += piece * POWERS_OF_THREE[symmetry[square]]
+        if canonical is None or symmetric_code < canonical:
+            canonical = symmetric_code
+    return canonical
+
+def find_legal_codes():
+    # All positions that can be reached from the empty board, no matter who starts.
+    legal_codes = set()
+    
+    def visit(game):
+        if game.code in legal_codes:
+            return
+        legal_codes.add(game.code)
+        if game.did_someone_win() or game.board_full():
+            return
+        for move_row, move_column in game.find_legal_moves():
+            game.make_move(move_row, move_column)
+            visit(game)
+            game.undo_move(move_row, move_column)
+    
+    visit(Game(True))
+    visit(Game(False))
+    return legal_codes
+
+
+class PositionRanking:
+    
+    def __init__(self, legal_codes, symmetric):
+        # Ranks are dense: 0 to size - 1. With symmetric ranking all symmetric positions share a rank.
+        if symmetric:
+            ranked_codes = sorted({canonical_code(code) for code in legal_codes})
+        else:
+            ranked_codes = sorted(legal_codes)
+        self.size = len(ranked_codes)
+        self.codes = array("l", ranked_codes)
+        rank_of_code = {code: rank for rank, code in enumerate(ranked_codes)}
+        # Lookup table over all codes, -1 for positions that are not legal.
+        self.ranks = array("h", [-1]) * CODE_COUNT
+        for code in legal_codes:
+            self.ranks[code] = rank_of_code[canonical_code(code) if symmetric else code]
+            
+    def rank(self, game):
+        return self.ranks[game.code]
+    
+    def unrank(self, rank):
+        # Returns the position with the rank. For symmetric ranking this is the canonical position.
+        return game_from_code(self.codes[rank])
+
+
+def solve_positions(ranking):
+    # Solve the positions backwards, from full boards to the empty board, so that
+    # the values of all following positions are known when a position is solved.
+    values = array("b", [0]) * ranking.size
+    best_moves = array("b", [-1]) * ranking.size
+    games = sorted((ranking.unrank(rank) for rank in range(ranking.size)),
+                   key=lambda game: game.move_count, reverse=True)
+    for game in games:
+        rank = ranking.rank(game)
+        if game.did_someone_win():
+            # Current player lost because the other player made the last move.
+            # Add move count to the evaluation because late losses are better than early losses.
+            values[rank] = -100 + game.move_count
+            continue
+        if game.board_full():
+            # Board is filled but no player won: Draw.
+            values[rank] = 0
+            continue
+        max_value = -float("inf")
+        for move_row, move_column in game.find_legal_moves():
+            game.make_move(move_row, move_column)
+            value = -values[ranking.rank(game)]
+            game.undo_move(move_row, move_column)
+            if value > max_value:
+                max_value = value
+                best_moves[rank] = move_row * 3 + move_column
+        values[rank] = max_value
+    return values, best_moves
+
+def make_computer_move(game):
+    rank = position_ranking.rank(game)
+    evaluation = solved_values[symmetric_ranking.rank(game)]
+    best_row, best_column = divmod(best_moves[rank], 3)
+    game.make_move(best_row, best_column)
+    print("Evaluation: ", evaluation)
+    print("Position rank: ", rank)
+    print()
+    # Intercept inputs that happened while the computer was thinking.
+    pygame.event.get()
+
+
+WIN_SIZE = 600
+
+screen = pygame.display.set_mode((WIN_SIZE, WIN_SIZE))
+pygame.display.set_caption("Tic-Tac-Toe")
+
+FPS = 30
+clock = pygame.time.Clock()
+
+painter = GamePainter(WIN_SIZE)
+
+legal_codes = find_legal_codes()
+position_ranking = PositionRanking(legal_codes, False)
+symmetric_ranking = PositionRanking(legal_codes, True)
+# Best moves depend on the orientation of the board, values do not.
+best_moves = solve_positions(position_ranking)[1]
+solved_values = solve_positions(symmetric_ranking)[0]
+print("Legal positions: ", position_ranking.size)
+print("Symmetry classes: ", symmetric_ranking.size)
+print()
+game = Game(False)
+
+game_over = False
+
+if not game.players_turn:
+    # Draw the board so that the window is not black while the computer is thinking.
+    screen.fill((255, 255, 255))
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    pygame.display.update()
+    
+    # Make the first computer move
+    make_computer_move(game)
+
+run = True
+while run:
+    clock.tick(FPS)
+    
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            run = False
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button != 1:
+                continue
+            
+            if game_over:
+                continue
+            
+            mouse_x, mouse_y = event.pos
+            row, column = painter.mouse_to_grid_pos(mouse_x, mouse_y)
+            if not game.is_move_legal(row, column):
+                continue
+            
+            game.make_move(row, column)
+            
+            if game.did_someone_win():
+                print("Player won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+            make_computer_move(game)
+            
+            if game.did_someone_win():
+                print("Computer won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+    screen.fill((255, 255, 255))
+    
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    
+    pygame.display.update()
+    
+pygame.display.quit()
@@ -0,0 +1,414 @@
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+
+# Zobrist keys for every board size. The random generator is seeded so that the keys,
+# and with them the checkpoints, stay the same between runs.
+zobrist_tables = {}
+
+def get_zobrist_table(rows, columns):
+    if (rows, columns) not in zobrist_tables:
+        zobrist_random = random.Random(rows * 1000 + columns)
+        pieces = [[zobrist_random.getrandbits(64) for square in range(rows * columns)] for piece in range(3)]
+        zobrist_tables[rows, columns] = (pieces, zobrist_random.getrandbits(64), zobrist_random.getrandbits(64))
+    return zobrist_tables[rows, columns]
+
+class Game:
+
+    CIRCLE = 1
+    CROSS = 2
+
+    # The board has rows x columns squares, k pieces in a row win.
+    def __init__(self, players_turn, rows=3, columns=3, k=3):
+        self.state = [[0] * columns for row in range(rows)]
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.players_turn = players_turn
+        self.move_count = 0
+        self.last_moves = []
+        self.zobrist_pieces, self.zobrist_side, self.zobrist_attacker = get_zobrist_table(rows, columns)
+        self.hash = self.zobrist_side if players_turn else 0
+
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        self.last_moves.append((row, column))
+        self.hash ^= self.zobrist_pieces[piece][row * self.columns + column] ^ self.zobrist_side
+
+    def undo_move(self, row, column):
+        piece = self.state[row][column]
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.move_count -= 1
+        self.last_moves.pop()
+        self.hash ^= self.zobrist_pieces[piece][row * self.columns + column] ^ self.zobrist_side
+
+    def count_in_direction(self, row, column, row_step, column_step):
+        piece = self.state[row][column]
+        count = 0
+        row += row_step
+        column += column_step
+        while 0 <= row < self.rows and 0 <= column < self.columns and self.state[row][column] == piece:
+            count += 1
+            row += row_step
+            column += column_step
+        return count
+
+    def did_someone_win(self):
+        # Only the last move can have completed a line.
+        if not self.last_moves:
+            return False
+        row, column = self.last_moves[-1]
+        for row_step, column_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1 + self.count_in_direction(row, column, row_step, column_step) \
+                      + self.count_in_direction(row, column, -row_step, -column_step)
+            if count >= self.k:
+                return True
+        return False
+
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+
+    def find_legal_moves(self):
+        # Central squares first, they take part in the most lines.
+        center_row = (self.rows - 1) / 2
+        center_column = (self.columns - 1) / 2
+        legal_moves = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        legal_moves.sort(key=lambda move: abs(move[0] - center_row) + abs(move[1] - center_column))
+        return legal_moves
+
+    def board_full(self):
+        return self.move_count == self.rows * self.columns
+
+
+INFINITY = 2 ** 32 - 1
+
+class ProofTable:
+
+    # 8 byte key plus 4 bytes each for the proof number, the disproof number and the work.
+    ENTRY_SIZE = 20
+    CHECKPOINT_HEADER = struct.Struct("<4sIIII")
+    CHECKPOINT_MAGIC = b"DFPN"
+
+    def __init__(self, memory_budget):
+        size = 2
+        while size * 2 * ProofTable.ENTRY_SIZE <= memory_budget:
+            size *= 2
+        self.size = size
+        # Buckets of two entries: the first one keeps the entry with more work, the second one is
+        # always replaced, so that a node always finds the numbers its children just stored.
+        self.index_mask = size - 2
+        self.keys = array("Q", [0]) * size
+        self.phis = array("I", [0]) * size
+        self.deltas = array("I", [0]) * size
+        # Number of nodes searched below the entry, 0 for empty entries.
+        self.works = array("I", [0]) * size
+        self.filled = 0
+        self.evictions = 0
+        
+    def lookup(self, key):
+        index = key & self.index_mask
+        if self.works[index] != 0 and self.keys[index] == key:
+            return self.phis[index], self.deltas[index]
+        index += 1
+        if self.works[index] != 0 and self.keys[index] == key:
+            return self.phis[index], self.deltas[index]
+        return 1, 1
+    
+    def store(self, key, phi, delta, work):
+        index = key & self.index_mask
+        work = min(max(work, 1), INFINITY)
+        if self.works[index] == 0 or self.keys[index] == key or self.works[index] <= work:
+            if self.works[index + 1] != 0 and self.keys[index + 1] == key:
+                self.works[index + 1] = 0
+                self.filled -= 1
+        else:
+            index += 1
+        if self.works[index] == 0:
+            self.filled += 1
+        elif self.keys[index] != key:
+            self.evictions += 1
+        self.keys[index] = key
+        self.phis[index] = phi
+        self.deltas[index] = delta
+        self.works[index] = work
+        
+    def save(self, path, rows, columns, k):
+        # Write to a temporary file first so that an interrupted save keeps the old checkpoint.
+        with open(path + ".tmp", "wb") as file:
+            file.write(ProofTable.CHECKPOINT_HEADER.pack(ProofTable.CHECKPOINT_MAGIC, rows, columns, k, self.size))
+            for entries in (self.keys, self.phis, self.deltas, self.works):
+                entries.tofile(file)
+        os.replace(path + ".tmp", path)
+
+    def load(self, path, rows, columns, k):
+        # Returns False if there is no checkpoint for this board and table size.
+        if not os.path.exists(path):
+            return False
+        with open(path, "rb") as file:
+            header = file.read(ProofTable.CHECKPOINT_HEADER.size)
+            if header != ProofTable.CHECKPOINT_HEADER.pack(ProofTable.CHECKPOINT_MAGIC, rows, columns, k, self.size):
+                return False
+            for entries in (self.keys, self.phis, self.deltas, self.works):
+                del entries[:]
+                entries.fromfile(file, self.size)
+        self.filled = self.size - self.works.count(0)
+        return True
+
+
+# Proof number search proves that the attacker wins. The defender succeeds with a draw.
+# The numbers are stored for the player to move: phi is the proof number of the goal of the player
+# to move and delta its disproof number, so that a node's phi is the smallest delta of its children.
+def position_key(game):
+    return game.hash ^ game.zobrist_attacker if attacker_is_player else game.hash
+
+def terminal_numbers(game):
+    if game.did_someone_win():
+        # The player to move lost: neither the attacker nor the defender reaches their goal.
+        return INFINITY, 0
+    # Draw: only the defender reaches the goal.
+    if game.players_turn == attacker_is_player:
+        return INFINITY, 0
+    return 0, INFINITY
+
+def mid(game, phi_threshold, delta_threshold):
+    # Depth-first proof number search (df-pn): search the node until its numbers reach a threshold.
+    global searched_nodes
+    searched_nodes += 1
+    if searched_nodes % PROGRESS_INTERVAL == 0:
+        report_progress()
+    key = position_key(game)
+    if game.did_someone_win() or game.board_full():
+        phi, delta = terminal_numbers(game)
+        proof_table.store(key, phi, delta, 1)
+        return
+    start_nodes = searched_nodes
+    legal_moves = game.find_legal_moves()
+    child_keys = []
+    for move_row, move_column in legal_moves:
+        game.make_move(move_row, move_column)
+        child_keys.append(position_key(game))
+        game.undo_move(move_row, move_column)
+    while True:
+        phi = second_delta = INFINITY
+        delta = 0
+        for index, child_key in enumerate(child_keys):
+            child_phi, child_delta = proof_table.lookup(child_key)
+            delta += child_phi
+            if child_delta < phi:
+                second_delta = phi
+                phi = child_delta
+                best_index = index
+                best_child_phi = child_phi
+            elif child_delta < second_delta:
+                second_delta = child_delta
+        if delta >= INFINITY:
+            # Only a proven child may make the sum infinite, large sums stay just below.
+            delta = INFINITY if phi == 0 else INFINITY - 1
+        if phi >= phi_threshold or delta >= delta_threshold:
+            proof_table.store(key, phi, delta, searched_nodes - start_nodes + 1)
+            return
+        child_phi_threshold = min(delta_threshold - delta + best_child_phi, INFINITY)
+        child_delta_threshold = min(phi_threshold, second_delta + 1)
+        move_row, move_column = legal_moves[best_index]
+        game.make_move(move_row, move_column)
+        mid(game, child_phi_threshold, child_delta_threshold)
+        game.undo_move(move_row, move_column)
+
+def prove(game, attacker):
+    # Returns whether the player to move reaches their goal.
+    global attacker_is_player, root_child_keys
+    attacker_is_player = attacker
+    root_child_keys = []
+    for move_row, move_column in game.find_legal_moves():
+        game.make_move(move_row, move_column)
+        root_child_keys.append(position_key(game))
+        game.undo_move(move_row, move_column)
+    mid(game, INFINITY, INFINITY)
+    phi, delta = proof_table.lookup(position_key(game))
+    return phi == 0
+
+def find_proving_move(game):
+    # The move to a child in which the player to move fails. Only the table is read, if the
+    # proving child was replaced the position is searched again, which stores it again.
+    for attempt in range(2):
+        for move_row, move_column in game.find_legal_moves():
+            game.make_move(move_row, move_column)
+            phi, delta = proof_table.lookup(position_key(game))
+            game.undo_move(move_row, move_column)
+            if delta == 0:
+                return (move_row, move_column)
+        mid(game, INFINITY, INFINITY)
+    return None
+
+def extract_proof(game, prover_is_player, proof):
+    # The proof is a DAG: a dictionary from the hash of every position in it to the move of the
+    # prover, or None where the opponent moves and every move has to be covered.
+    # Transpositions are stored once.
+    if game.hash in proof:
+        return
+    if game.did_someone_win() or game.board_full():
+        proof[game.hash] = None
+        return
+    if game.players_turn == prover_is_player:
+        move = find_proving_move(game)
+        proof[game.hash] = move
+        if move is None:
+            return
+        moves = [move]
+    else:
+        proof[game.hash] = None
+        moves = game.find_legal_moves()
+    for move_row, move_column in moves:
+        game.make_move(move_row, move_column)
+        extract_proof(game, prover_is_player, proof)
+        game.undo_move(move_row, move_column)
+
+def build_proof(game, attacker, prover_is_player):
+    global attacker_is_player
+    attacker_is_player = attacker
+    proof = {}
+    extract_proof(game, prover_is_player, proof)
+    return proof
+
+def verify_proof(game, attacker, prover_is_player, proof, verified_positions=None):
+    if verified_positions is None:
+        verified_positions = set()
+    if game.hash in verified_positions:
+        return True
+    if game.did_someone_win():
+        # The attacker has to win, the defender must not lose. Both means the prover did not lose.
+        return game.players_turn != prover_is_player
+    if game.board_full():
+        return prover_is_player != attacker
+    if game.hash not in proof:
+        return False
+    legal_moves = game.find_legal_moves()
+    if game.players_turn == prover_is_player:
+        if proof[game.hash] not in legal_moves:
+            return False
+        moves = [proof[game.hash]]
+    else:
+        moves = legal_moves
+    for move_row, move_column in moves:
+        game.make_move(move_row, move_column)
+        proven = verify_proof(game, attacker, prover_is_player, proof, verified_positions)
+        game.undo_move(move_row, move_column)
+        if not proven:
+            return False
+    verified_positions.add(game.hash)
+    return True
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+def solve(game):
+    # Returns the result for the player to move and which proofs show it, as (attacker, prover):
+    # a win or loss needs the proof of the winner, a draw proofs that neither player can win.
+    # The proofs can be built from the table with build_proof.
+    player = game.players_turn
+    if prove(game, player):
+        return WIN, [(player, player)]
+    if prove(game, not player):
+        return DRAW, [(player, not player), (not player, player)]
+    return LOSS, [(not player, not player)]
+
+def report_progress():
+    global last_checkpoint_time
+    elapsed = time.perf_counter() - start_time
+    # The root is only stored when it is solved, so its numbers are computed from its children.
+    root_phi = INFINITY
+    root_delta = 0
+    for child_key in root_child_keys:
+        child_phi, child_delta = proof_table.lookup(child_key)
+        root_phi = min(root_phi, child_delta)
+        root_delta = min(root_delta + child_phi, INFINITY)
+    print(f"Nodes: {searched_nodes}  Nodes per second: {searched_nodes / elapsed:.0f}  "
+          f"Root: phi {root_phi} delta {root_delta}  "
+          f"Table fill: {proof_table.filled / proof_table.size:.3f}  Evictions: {proof_table.evictions}")
+    if time.perf_counter() - last_checkpoint_time > CHECKPOINT_INTERVAL:
+        proof_table.save(CHECKPOINT_PATH, rows, columns, k)
+        last_checkpoint_time = time.perf_counter()
+
+def minimax(game, depth):
+    if game.did_someone_win():
+        # Current player lost because the other player made the last move.
+        # Add move count to the evaluation because late losses are better than early losses.
+        return -100 + game.move_count
+    if game.board_full():
+        # Board is filled but no player won: Draw.
+        return 0
+    max_value = -float("inf")
+    legal_moves = game.find_legal_moves()
+    for move_row, move_column in legal_moves:
+        game.make_move(move_row, move_column)
+        value = -minimax(game, depth+1)
+        game.undo_move(move_row, move_column)
+        if value > max_value:
+            max_value = value
+    return max_value
+
+def verify_against_minimax():
+    # Compare the solver with plain minimax for the 3x3 board and all positions after the first move.
+    mismatches = 0
+    for players_turn in (True, False):
+        game = Game(players_turn)
+        positions = [None] + game.find_legal_moves()
+        for first_move in positions:
+            if first_move is not None:
+                game.make_move(*first_move)
+            result, proofs = solve(game)
+            value = minimax(game, 0)
+            expected = WIN if value > 0 else LOSS if value < 0 else DRAW
+            proofs_valid = all(verify_proof(game, attacker, prover, build_proof(game, attacker, prover))
+                               for attacker, prover in proofs)
+            if result != expected or not proofs_valid:
+                mismatches += 1
+            if first_move is not None:
+                game.undo_move(*first_move)
+    return mismatches
+
+
+MEMORY_BUDGET = 64 * 1024 * 1024
+PROGRESS_INTERVAL = 100000
+CHECKPOINT_INTERVAL = 60
+RESULT_NAMES = {WIN: "Win", DRAW: "Draw", LOSS: "Loss"}
+
+# Usage: proof number search.py [rows columns k [proof]]
+rows, columns, k = (int(argument) for argument in sys.argv[1:4]) if len(sys.argv) >= 4 else (3, 3, 3)
+# Proofs can get very large on big boards, so they are only built for 3x3 or when asked for.
+BUILD_PROOFS = (rows, columns, k) == (3, 3, 3) or sys.argv[4:5] == ["proof"]
+CHECKPOINT_PATH = f"dfpn_{rows}x{columns}_k{k}.checkpoint"
+
+proof_table = ProofTable(MEMORY_BUDGET)
+searched_nodes = 0
+attacker_is_player = True
+start_time = last_checkpoint_time = time.perf_counter()
+
+if (rows, columns, k) == (3, 3, 3):
+    print("Mismatches with minimax: ", verify_against_minimax())
+
+game = Game(False, rows, columns, k)
+if proof_table.load(CHECKPOINT_PATH, rows, columns, k):
+    print("Checkpoint loaded, table fill: ", proof_table.filled / proof_table.size)
+result, proofs = solve(game)
+proof_table.save(CHECKPOINT_PATH, rows, columns, k)
+print(f"{rows}x{columns} board, {k} in a row: {RESULT_NAMES[result]} for the first player")
+if BUILD_PROOFS:
+    for attacker, prover in proofs:
+        proof = build_proof(game, attacker, prover)
+        print("Proof positions: ", len(proof),
+              " Valid: ", verify_proof(game, attacker, prover, proof))
+print("Searched nodes: ", searched_nodes)
+print("Time: ", time.perf_counter() - start_time)
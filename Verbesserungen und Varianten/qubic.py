@@ -0,0 +1,356 @@
+import sys
+import time
+
+import pygame
+pygame.init()
+
+# Squares of the 4x4x4 board are numbered layer * 16 + row * 4 + column
+# and every square is one bit of a 64 bit board.
+def square_index(layer, row, column):
+    return layer * 16 + row * 4 + column
+
+def find_win_lines():
+    # All lines of 4 squares. Each direction is only used once, not also its opposite.
+    lines = []
+    directions = [(d_layer, d_row, d_column)
+                  for d_layer in (-1, 0, 1) for d_row in (-1, 0, 1) for d_column in (-1, 0, 1)
+                  if (d_layer, d_row, d_column) > (0, 0, 0)]
+    for d_layer, d_row, d_column in directions:
+        for layer in range(4):
+            for row in range(4):
+                for column in range(4):
+                    end = (layer + 3 * d_layer, row + 3 * d_row, column + 3 * d_column)
+                    if not all(0 <= coordinate < 4 for coordinate in end):
+                        continue
+                    mask = 0
+                    for step in range(4):
+                        mask |= 1 << square_index(layer + step * d_layer, row + step * d_row, column + step * d_column)
+                    if mask not in lines:
+                        lines.append(mask)
+    return lines
+
+WIN_LINES = find_win_lines()
+LINES_THROUGH_SQUARE = [[mask for mask in WIN_LINES if mask >> square & 1] for square in range(64)]
+# Squares on many lines are the strongest, so they are searched first.
+MOVE_ORDER = sorted(range(64), key=lambda square: -len(LINES_THROUGH_SQUARE[square]))
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    def __init__(self, players_turn):
+        self.circles = 0
+        self.crosses = 0
+        self.players_turn = players_turn
+        self.move_count = 0
+        self.last_moves = []
+    
+    def make_move(self, square):
+        if self.players_turn:
+            self.circles |= 1 << square
+        else:
+            self.crosses |= 1 << square
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        self.last_moves.append(square)
+    
+    def undo_move(self, square):
+        self.players_turn = not self.players_turn
+        if self.players_turn:
+            self.circles &= ~(1 << square)
+        else:
+            self.crosses &= ~(1 << square)
+        self.move_count -= 1
+        self.last_moves.pop()
+    
+    def get_piece(self, square):
+        if self.circles >> square & 1:
+            return Game.CIRCLE
+        if self.crosses >> square & 1:
+            return Game.CROSS
+        return 0
+    
+    def did_someone_win(self):
+        # Only the player who made the last move can have won, and only on a line through that move.
+        if not self.last_moves:
+            return False
+        board = self.crosses if self.players_turn else self.circles
+        for mask in LINES_THROUGH_SQUARE[self.last_moves[-1]]:
+            if board & mask == mask:
+                return True
+        return False
+    
+    def is_move_legal(self, square):
+        return not (self.circles | self.crosses) >> square & 1
+    
+    def find_legal_moves(self):
+        occupied = self.circles | self.crosses
+        return [square for square in MOVE_ORDER if not occupied >> square & 1]
+    
+    def board_full(self):
+        return self.move_count == 64
+
+
+class GamePainter:
+    
+    # The four layers are drawn as 2D boards in a 2x2 arrangement.
+    def __init__(self, win_size):
+        self.LAYER_SIZE = win_size // 2
+        self.SQUARE_SIZE = self.LAYER_SIZE // 4
+        self.GRID_THICKNESS = win_size // 300
+        self.LAYER_THICKNESS = win_size // 100
+        self.CIRCLE_THICKNESS = win_size // 140
+        self.CIRCLE_RADIUS = self.SQUARE_SIZE // 2.4
+        self.CROSS_THICKNESS = win_size // 108
+        self.CROSS_SIZE = self.SQUARE_SIZE // 3
+    
+    def get_layer_pos(self, layer):
+        x = layer % 2 * self.LAYER_SIZE
+        y = layer // 2 * self.LAYER_SIZE
+        return (x, y)
+    
+    def draw_grid(self, screen):
+        for layer in range(4):
+            layer_x, layer_y = self.get_layer_pos(layer)
+            for row in range(4):
+                for column in range(4):
+                    x = layer_x + column * self.SQUARE_SIZE
+                    y = layer_y + row * self.SQUARE_SIZE
+                    pygame.draw.rect(screen, (0, 0, 0),
+                                     (x, y, self.SQUARE_SIZE, self.SQUARE_SIZE), self.GRID_THICKNESS)
+            pygame.draw.rect(screen, (0, 0, 0),
+                             (layer_x, layer_y, self.LAYER_SIZE, self.LAYER_SIZE), self.LAYER_THICKNESS)
+    
+    def draw_game_state(self, screen, game):
+        for square in range(64):
+            piece = game.get_piece(square)
+            if piece == Game.CIRCLE:
+                self.draw_circle(screen, square)
+            elif piece == Game.CROSS:
+                self.draw_cross(screen, square)
+    
+    def draw_circle(self, screen, square):
+        x, y = self.get_square_center_pos(square)
+        pygame.draw.circle(screen, (0, 0, 255), (x, y), self.CIRCLE_RADIUS, self.CIRCLE_THICKNESS)
+    
+    def draw_cross(self, screen, square):
+        x, y = self.get_square_center_pos(square)
+        left_x = x - self.CROSS_SIZE
+        right_x = x + self.CROSS_SIZE
+        top_y = y - self.CROSS_SIZE
+        bottom_y = y + self.CROSS_SIZE
+        pygame.draw.line(screen, (255, 0, 0), (left_x, top_y), (right_x, bottom_y), self.CROSS_THICKNESS)
+        pygame.draw.line(screen, (255, 0, 0), (right_x, top_y), (left_x, bottom_y), self.CROSS_THICKNESS)
+    
+    def get_square_center_pos(self, square):
+        layer, rest = divmod(square, 16)
+        row, column = divmod(rest, 4)
+        layer_x, layer_y = self.get_layer_pos(layer)
+        x = layer_x + column * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        y = layer_y + row * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        return (x, y)
+    
+    def mouse_to_grid_pos(self, mouse_x, mouse_y):
+        layer = min(mouse_y // self.LAYER_SIZE, 1) * 2 + min(mouse_x // self.LAYER_SIZE, 1)
+        row = min(mouse_y % self.LAYER_SIZE // self.SQUARE_SIZE, 3)
+        column = min(mouse_x % self.LAYER_SIZE // self.SQUARE_SIZE, 3)
+        return square_index(layer, row, column)
+
+
+WIN_VALUE = 10000
+# Value of a line that only one player occupies, by the number of pieces on it.
+LINE_VALUES = [0, 1, 10, 100, 0]
+
+class SearchTimeout(Exception):
+    pass
+
+def evaluate(game):
+    # Heuristic value for the player to move at the depth limit.
+    value = 0
+    for mask in WIN_LINES:
+        circles = game.circles & mask
+        crosses = game.crosses & mask
+        if not crosses:
+            value += LINE_VALUES[circles.bit_count()]
+        elif not circles:
+            value -= LINE_VALUES[crosses.bit_count()]
+    return value if game.players_turn else -value
+
+def search(game, time_limit, max_depth):
+    # Iterative deepening: the best move of the last finished depth is used when the time is up.
+    global best_move, searched_nodes, deadline
+    searched_nodes = 0
+    deadline = time.perf_counter() + time_limit
+    search_move = None
+    evaluation = 0
+    reached_depth = 0
+    for depth_limit in range(1, max_depth + 1):
+        best_move = search_move
+        try:
+            value = minimax(game, -float("inf"), float("inf"), 0, depth_limit)
+        except SearchTimeout:
+            break
+        search_move = best_move
+        evaluation = value
+        reached_depth = depth_limit
+        if abs(value) > WIN_VALUE // 2 or depth_limit >= 64 - game.move_count:
+            # The game is decided or searched to the end.
+            break
+    return evaluation, search_move, reached_depth
+
+def make_computer_move(game):
+    start_time = time.perf_counter()
+    evaluation, move, depth = search(game, COMPUTER_TIME_LIMIT, 64)
+    game.make_move(move)
+    elapsed = time.perf_counter() - start_time
+    print("Evaluation: ", evaluation)
+    print("Search depth: ", depth)
+    print("Searched nodes: ", searched_nodes)
+    print("Nodes per second: ", round(searched_nodes / elapsed))
+    print()
+    # Intercept inputs that happened while the computer was thinking.
+    pygame.event.get()
+
+def minimax(game, alpha, beta, depth, depth_limit):
+    global best_move, searched_nodes
+    searched_nodes += 1
+    # The first depth is always finished so that there is a move to play.
+    if searched_nodes & 1023 == 0 and depth_limit > 1 and time.perf_counter() > deadline:
+        raise SearchTimeout()
+    if game.did_someone_win():
+        # Current player lost because the other player made the last move.
+        # Add move count to the evaluation because late losses are better than early losses.
+        return -WIN_VALUE + game.move_count
+    if game.board_full():
+        # Board is filled but no player won: Draw.
+        return 0
+    if depth == depth_limit:
+        return evaluate(game)
+    max_value = -float("inf")
+    legal_moves = game.find_legal_moves()
+    if depth == 0 and best_move is not None:
+        # The best move of the last depth most likely is the best move again.
+        legal_moves.remove(best_move)
+        legal_moves.insert(0, best_move)
+    for move in legal_moves:
+        game.make_move(move)
+        value = -minimax(game, -beta, -alpha, depth+1, depth_limit)
+        game.undo_move(move)
+        if value > max_value:
+            max_value = value
+            if depth == 0:
+                best_move = move
+        if value > alpha:
+            alpha = value
+        if value >= beta:
+            break
+    return max_value
+
+def benchmark_engine():
+    # Nodes per second for fixed depths and the depth reached for time limits, from an opening position.
+    opening_moves = [square_index(0, 0, 0), square_index(1, 1, 1), square_index(3, 3, 3)]
+    for depth in range(1, BENCHMARK_MAX_DEPTH + 1):
+        game = Game(False)
+        for move in opening_moves:
+            game.make_move(move)
+        start_time = time.perf_counter()
+        search(game, float("inf"), depth)
+        elapsed = time.perf_counter() - start_time
+        print(f"Depth {depth}: {searched_nodes} nodes in {elapsed:.3f} s, {searched_nodes / elapsed:.0f} nodes per second")
+    for time_limit in BENCHMARK_TIME_LIMITS:
+        game = Game(False)
+        for move in opening_moves:
+            game.make_move(move)
+        start_time = time.perf_counter()
+        evaluation, move, depth = search(game, time_limit, 64)
+        elapsed = time.perf_counter() - start_time
+        print(f"Time limit {time_limit} s: depth {depth}, time to move {elapsed:.3f} s")
+
+
+COMPUTER_TIME_LIMIT = 2
+BENCHMARK_MAX_DEPTH = 4
+BENCHMARK_TIME_LIMITS = [0.1, 0.5, 2]
+
+if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+    benchmark_engine()
+    sys.exit()
+
+WIN_SIZE = 600
+
+screen = pygame.display.set_mode((WIN_SIZE, WIN_SIZE))
+pygame.display.set_caption("Tic-Tac-Toe 4x4x4")
+
+FPS = 30
+clock = pygame.time.Clock()
+
+painter = GamePainter(WIN_SIZE)
+game = Game(False)
+
+game_over = False
+
+if not game.players_turn:
+    # Draw the board so that the window is not black while the computer is thinking.
+    screen.fill((255, 255, 255))
+    painter.draw_game_state(screen, game)
+    painter.draw_grid(screen)
+    pygame.display.update()
+    
+    # Make the first computer move
+    make_computer_move(game)
+
+run = True
+while run:
+    clock.tick(FPS)
+    
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            run = False
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button != 1:
+                continue
+            
+            if game_over:
+                continue
+            
+            mouse_x, mouse_y = event.pos
+            square = painter.mouse_to_grid_pos(mouse_x, mouse_y)
+            if not game.is_move_legal(square):
+                continue
+            
+            game.make_move(square)
+            
+            if game.did_someone_win():
+                print("Player won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+            # Show the player's move while the computer is thinking.
+            screen.fill((255, 255, 255))
+            painter.draw_game_state(screen, game)
+            painter.draw_grid(screen)
+            pygame.display.update()
+            
+            make_computer_move(game)
+            
+            if game.did_someone_win():
+                print("Computer won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+    
+    screen.fill((255, 255, 255))
+    
+    painter.draw_game_state(screen, game)
+    painter.draw_grid(screen)
+    
+    pygame.display.update()
+
+pygame.display.quit()
@@ -0,0 +1,334 @@
+import mmap
+import os
+import queue
+import random
+import struct
+import time
+from array import array
+from multiprocessing import Process, Queue
+from multiprocessing.shared_memory import SharedMemory
+
+# A position is encoded as a base 3 number with one digit per square (row * 3 + column).
+# The side to move is added as one more digit so that equal boards with different players to move differ.
+POWERS_OF_THREE = [3 ** square for square in range(9)]
+TURN_OFFSET = 3 ** 9
+CODE_COUNT = 2 * TURN_OFFSET
+
+# The 8 symmetries of the board as square permutations: symmetry[square] is the square it is moved to.
+def rotate_square(square):
+    row, column = divmod(square, 3)
+    return column * 3 + 2 - row
+
+def mirror_square(square):
+    row, column = divmod(square, 3)
+    return row * 3 + 2 - column
+
+SYMMETRIES = []
+for mirrored in (False, True):
+    symmetry = [mirror_square(square) if mirrored else square for square in range(9)]
+    for rotation in range(4):
+        SYMMETRIES.append(symmetry)
+        symmetry = [rotate_square(target) for target in symmetry]
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    def __init__(self, players_turn):
+        self.state = [[0, 0, 0],
+                      [0, 0, 0],
+                      [0, 0, 0]]
+        self.players_turn = players_turn
+        self.move_count = 0
+        self.code = TURN_OFFSET if players_turn else 0
+        
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.code += piece * POWERS_OF_THREE[row * 3 + column] + (-TURN_OFFSET if self.players_turn else TURN_OFFSET)
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        
+    def undo_move(self, row, column):
+        piece = self.state[row][column]
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.code -= piece * POWERS_OF_THREE[row * 3 + column] + (-TURN_OFFSET if self.players_turn else TURN_OFFSET)
+        self.move_count -= 1
+        
+    def did_someone_win(self):
+        for i in range(3):
+            # Horizontal
+            if self.state[i][0] == self.state[i][1] == self.state[i][2] != 0:
+                return True
+            # Vertical
+            if self.state[0][i] == self.state[1][i] == self.state[2][i] != 0:
+                return True     
+        
+        # Diagonal
+        if self.state[0][0] == self.state[1][1] == self.state[2][2] != 0:
+            return True
+        if self.state[0][2] == self.state[1][1] == self.state[2][0] != 0:
+            return True
+        
+        return False
+        
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+    
+    def find_legal_moves(self):
+        legal_moves = []
+        for row in range(3):
+            for column in range(3):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        return legal_moves
+                
+    def board_full(self):
+        return self.move_count == 9
+
+
+def game_from_code(code):
+    game = Game(code >= TURN_OFFSET)
+    for square in range(9):
+        piece = code // POWERS_OF_THREE[square] % 3
+        if piece != 0:
+            game.state[square // 3][square % 3] = piece
+            game.move_count += 1
+    game.code = code
+    return game
+
+def canonical_code(code):
+    turn = code - code % TURN_OFFSET
+    canonical = None
+    for symmetry in SYMMETRIES:
+        symmetric_code = turn
+        for square in range(9):
+            piece = code // POWERS_OF_THREE[square] % 3
+            symmetric_code += piece * POWERS_OF_THREE[symmetry[square]]
+        if canonical is None or symmetric_code < canonical:
+            canonical = symmetric_code
+    return canonical
+
+def find_legal_codes():
+    # All positions that can be reached from the empty board, no matter who starts.
+    legal_codes = set()
+    
+    def visit(game):
+        if game.code in legal_codes:
+            return
+        legal_codes.add(game.code)
+        if game.did_someone_win() or game.board_full():
+            return
+        for move_row, move_column in game.find_legal_moves():
+            game.make_move(move_row, move_column)
+            visit(game)
+            game.undo_move(move_row, move_column)
+    
+    visit(Game(True))
+    visit(Game(False))
+    return legal_codes
+
+
+class PositionRanking:
+    
+    def __init__(self, legal_codes, symmetric):
+        # Ranks are dense: 0 to size - 1. With symmetric ranking all symmetric positions share a rank.
+        if symmetric:
+            ranked_codes = sorted({canonical_code(code) for code in legal_codes})
+        else:
+            ranked_codes = sorted(legal_codes)
+        self.size = len(ranked_codes)
+        self.codes = array("l", ranked_codes)
+        rank_of_code = {code: rank for rank, code in enumerate(ranked_codes)}
+        # Lookup table over all codes, -1 for positions that are not legal.
+        self.ranks = array("h", [-1]) * CODE_COUNT
+        for code in legal_codes:
+            self.ranks[code] = rank_of_code[canonical_code(code) if symmetric else code]
+            
+    def rank(self, game):
+        return self.ranks[game.code]
+    
+    def unrank(self, rank):
+        # Returns the position with the rank. For symmetric ranking this is the canonical position.
+        return game_from_code(self.codes[rank])
+
+
+def solve_positions(ranking):
+    # Solve the positions backwards, from full boards to the empty board, so that
+    # the values of all following positions are known when a position is solved.
+    values = array("b", [0]) * ranking.size
+    best_moves = array("b", [-1]) * ranking.size
+    games = sorted((ranking.unrank(rank) for rank in range(ranking.size)),
+                   key=lambda game: game.move_count, reverse=True)
+    for game in games:
+        rank = ranking.rank(game)
+        if game.did_someone_win():
+            # Current player lost because the other player made the last move.
+            # Add move count to the evaluation because late losses are better than early losses.
+            values[rank] = -100 + game.move_count
+            continue
+        if game.board_full():
+            # Board is filled but no player won: Draw.
+            values[rank] = 0
+            continue
+        max_value = -float("inf")
+        for move_row, move_column in game.find_legal_moves():
+            game.make_move(move_row, move_column)
+            value = -values[ranking.rank(game)]
+            game.undo_move(move_row, move_column)
+            if value > max_value:
+                max_value = value
+                best_moves[rank] = move_row * 3 + move_column
+        values[rank] = max_value
+    return values, best_moves
+
+# Solved table layout: header, rank of every position code (int16), value and best square of every rank (int8).
+TABLE_HEADER = struct.Struct("<4sIQ")
+TABLE_MAGIC = b"TTTS"
+
+def pack_solved_table(ranking, values, best_moves):
+    return (TABLE_HEADER.pack(TABLE_MAGIC, CODE_COUNT, ranking.size)
+            + ranking.ranks.tobytes() + values.tobytes() + best_moves.tobytes())
+
+def publish_solved_table(table_bytes):
+    # The caller owns the block and has to close and unlink it when all workers are done.
+    shared_memory = SharedMemory(create=True, size=len(table_bytes))
+    shared_memory.buf[:len(table_bytes)] = table_bytes
+    return shared_memory
+
+def write_solved_table_file(path, table_bytes):
+    with open(path + ".tmp", "wb") as file:
+        file.write(table_bytes)
+    os.replace(path + ".tmp", path)
+
+
+class SolvedTable:
+    
+    # Read-only view of a published table. Nothing is copied, lookups read the shared pages.
+    def __init__(self, memory, buffer):
+        self.memory = memory
+        magic, code_count, size = TABLE_HEADER.unpack_from(buffer)
+        if magic != TABLE_MAGIC or code_count != CODE_COUNT:
+            raise ValueError("Not a solved table for this board")
+        view = memoryview(buffer).toreadonly()
+        offset = TABLE_HEADER.size
+        self.ranks = view[offset:offset + 2 * code_count].cast("h")
+        offset += 2 * code_count
+        self.values = view[offset:offset + size].cast("b")
+        offset += size
+        self.best_moves = view[offset:offset + size].cast("b")
+        
+    def lookup(self, game):
+        rank = self.ranks[game.code]
+        return self.values[rank], self.best_moves[rank]
+    
+    def close(self):
+        # The views have to be released before the memory can be closed.
+        for view in (self.ranks, self.values, self.best_moves):
+            view.release()
+        self.memory.close()
+
+
+def attach_shared_memory(name):
+    shared_memory = SharedMemory(name=name)
+    return SolvedTable(shared_memory, shared_memory.buf)
+
+def attach_file(path):
+    with open(path, "rb") as file:
+        mapped_file = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return SolvedTable(mapped_file, mapped_file)
+
+def read_memory_usage(table_name):
+    # Resident memory in kB and the part of it that is the mapped table (Linux only).
+    # The table is the mapping whose path ends with the shared memory name or the file name.
+    usage = {"VmRSS": 0, "Table": 0}
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                name, value = line.split(":", 1)
+                if name == "VmRSS":
+                    usage[name] = int(value.split()[0])
+        with open("/proc/self/smaps") as smaps:
+            in_table = False
+            for line in smaps:
+                fields = line.split()
+                if not fields[0].endswith(":"):
+                    # The first line of a mapping: address range, permissions, offset, device, inode and path.
+                    in_table = len(fields) >= 6 and fields[5].endswith("/" + table_name)
+                elif in_table and fields[0] == "Rss:":
+                    usage["Table"] += int(fields[1])
+    except OSError:
+        pass
+    return usage
+
+def run_worker(source, from_file, game_count, results):
+    start_time = time.perf_counter()
+    table = attach_file(source) if from_file else attach_shared_memory(source)
+    attach_latency = time.perf_counter() - start_time
+    # Play games with perfect moves from random openings. All of them have to end in a draw.
+    move_random = random.Random(os.getpid())
+    draws = 0
+    for game_number in range(game_count):
+        game = Game(move_random.random() < 0.5)
+        game.make_move(*move_random.choice(game.find_legal_moves()))
+        while not game.did_someone_win() and not game.board_full():
+            value, best_move = table.lookup(game)
+            game.make_move(*divmod(best_move, 3))
+        if not game.did_someone_win():
+            draws += 1
+    results.put((attach_latency, read_memory_usage(os.path.basename(source)), draws))
+    table.close()
+
+def run_workers(source, from_file, worker_count, game_count):
+    results = Queue()
+    workers = [Process(target=run_worker, args=(source, from_file, game_count, results))
+               for worker in range(worker_count)]
+    for worker in workers:
+        worker.start()
+    worker_results = []
+    try:
+        while len(worker_results) < worker_count:
+            try:
+                worker_results.append(results.get(timeout=1))
+            except queue.Empty:
+                # A worker that failed never sends its result, so waiting for it would block forever.
+                failed_workers = [worker for worker in workers if worker.exitcode not in (None, 0)]
+                if failed_workers:
+                    raise RuntimeError(f"Worker failed with exit code {failed_workers[0].exitcode}")
+    finally:
+        for worker in workers:
+            if len(worker_results) < worker_count:
+                worker.terminate()
+            worker.join()
+    return worker_results
+
+
+WORKER_COUNTS = [1, 2, 4, 8]
+GAMES_PER_WORKER = 1000
+TABLE_PATH = "solved_table.bin"
+
+if __name__ == "__main__":
+    legal_codes = find_legal_codes()
+    position_ranking = PositionRanking(legal_codes, False)
+    solved_values, best_moves = solve_positions(position_ranking)
+    table_bytes = pack_solved_table(position_ranking, solved_values, best_moves)
+    print("Solved table size: ", len(table_bytes), "bytes")
+    shared_memory = publish_solved_table(table_bytes)
+    try:
+        write_solved_table_file(TABLE_PATH, table_bytes)
+        for source, from_file, name in ((shared_memory.name, False, "Shared memory"), (TABLE_PATH, True, "Mapped file")):
+            for worker_count in WORKER_COUNTS:
+                worker_results = run_workers(source, from_file, worker_count, GAMES_PER_WORKER)
+                attach_latency = sum(result[0] for result in worker_results) / worker_count
+                rss = sum(result[1]["VmRSS"] for result in worker_results) / worker_count
+                table_rss = sum(result[1]["Table"] for result in worker_results) / worker_count
+                draws = sum(result[2] for result in worker_results)
+                print(f"{name}, {worker_count} workers: attach latency {attach_latency * 1000:.3f} ms, "
+                      f"RSS per worker {rss:.0f} kB ({table_rss:.0f} kB of the shared table), "
+                      f"draws {draws} of {worker_count * GAMES_PER_WORKER}")
+    finally:
+        # Otherwise the segment stays in /dev/shm when a worker fails.
+        shared_memory.close()
+        shared_memory.unlink()
@@ -0,0 +1,417 @@
+import time
+
+import pygame
+pygame.init()
+
+# A window is a line of k squares (row * columns + column) in which a player can still get k in a row.
+window_tables = {}
+
+def get_window_table(rows, columns, k):
+    if (rows, columns, k) not in window_tables:
+        windows = []
+        for row_step, column_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for row in range(rows):
+                for column in range(columns):
+                    end_row = row + (k - 1) * row_step
+                    end_column = column + (k - 1) * column_step
+                    if 0 <= end_row < rows and 0 <= end_column < columns:
+                        windows.append([(row + step * row_step) * columns + column + step * column_step
+                                        for step in range(k)])
+        windows_through_square = [[] for square in range(rows * columns)]
+        for window, squares in enumerate(windows):
+            for square in squares:
+                windows_through_square[square].append(window)
+        window_tables[rows, columns, k] = (windows, windows_through_square)
+    return window_tables[rows, columns, k]
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    # The board has rows x columns squares, k pieces in a row win.
+    def __init__(self, players_turn, rows, columns, k):
+        self.state = [[0] * columns for row in range(rows)]
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.players_turn = players_turn
+        self.move_count = 0
+        self.windows, self.windows_through_square = get_window_table(rows, columns, k)
+        # Pieces of every player in every window, indexed by piece - 1.
+        self.window_counts = [[0] * len(self.windows), [0] * len(self.windows)]
+        # Windows without opponent pieces, by the number of own pieces. A window with k - 1 own pieces
+        # is a threat on its empty square, one with k - 2 own pieces becomes a threat with one more move.
+        self.open_windows = [[set(range(len(self.windows)))] + [set() for level in range(k)] for player in range(2)]
+    
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        player = piece - 1
+        opponent = 1 - player
+        for window in self.windows_through_square[row * self.columns + column]:
+            own = self.window_counts[player][window]
+            other = self.window_counts[opponent][window]
+            if other == 0:
+                self.open_windows[player][own].remove(window)
+                self.open_windows[player][own + 1].add(window)
+            if own == 0:
+                # The window is blocked for the opponent now.
+                self.open_windows[opponent][other].remove(window)
+            self.window_counts[player][window] = own + 1
+    
+    def undo_move(self, row, column):
+        piece = self.state[row][column]
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.move_count -= 1
+        player = piece - 1
+        opponent = 1 - player
+        for window in self.windows_through_square[row * self.columns + column]:
+            own = self.window_counts[player][window] - 1
+            other = self.window_counts[opponent][window]
+            if other == 0:
+                self.open_windows[player][own + 1].remove(window)
+                self.open_windows[player][own].add(window)
+            if own == 0:
+                self.open_windows[opponent][other].add(window)
+            self.window_counts[player][window] = own
+    
+    def did_someone_win(self):
+        # Only the player who made the last move can have won.
+        last_player = 1 if self.players_turn else 0
+        return len(self.open_windows[last_player][self.k]) > 0
+    
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+    
+    def find_legal_moves(self):
+        legal_moves = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        return legal_moves
+    
+    def find_nearby_moves(self):
+        # Empty squares next to a piece. Moves far away from all pieces are never useful.
+        if self.move_count == 0:
+            return [(self.rows // 2, self.columns // 2)]
+        nearby_moves = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                if self.state[row][column] != 0:
+                    continue
+                for neighbor_row in range(max(row - 1, 0), min(row + 2, self.rows)):
+                    if any(self.state[neighbor_row][neighbor_column] != 0
+                           for neighbor_column in range(max(column - 1, 0), min(column + 2, self.columns))):
+                        nearby_moves.append((row, column))
+                        break
+        return nearby_moves
+    
+    def find_empty_squares(self, player, level):
+        # Empty squares of the windows of the player with level own pieces and no opponent pieces.
+        empty_squares = set()
+        for window in self.open_windows[player][level]:
+            for square in self.windows[window]:
+                row, column = divmod(square, self.columns)
+                if self.state[row][column] == 0:
+                    empty_squares.add((row, column))
+        return empty_squares
+    
+    def find_winning_squares(self, piece):
+        # Squares that complete k in a row. Two of them are an open k - 1 pattern, one a half-open one.
+        return self.find_empty_squares(piece - 1, self.k - 1)
+    
+    def find_threat_moves(self, piece):
+        # Moves that create a new winning square out of a k - 2 pattern.
+        return self.find_empty_squares(piece - 1, self.k - 2)
+    
+    def board_full(self):
+        return self.move_count == self.rows * self.columns
+
+
+class GamePainter:
+    
+    def __init__(self, win_size, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.SQUARE_SIZE = win_size // max(rows, columns)
+        self.GRID_THICKNESS = max(win_size // 300, 1)
+        self.CIRCLE_THICKNESS = max(self.SQUARE_SIZE // 12, 1)
+        self.CIRCLE_RADIUS = self.SQUARE_SIZE // 2.4
+        self.CROSS_THICKNESS = max(self.SQUARE_SIZE // 9, 1)
+        self.CROSS_SIZE = self.SQUARE_SIZE // 3
+    
+    def draw_grid(self, screen):
+        for row in range(self.rows):
+            for column in range(self.columns):
+                x = column * self.SQUARE_SIZE
+                y = row * self.SQUARE_SIZE
+                pygame.draw.rect(screen, (0, 0, 0),
+                                 (x, y, self.SQUARE_SIZE, self.SQUARE_SIZE), self.GRID_THICKNESS)
+    
+    def draw_game_state(self, screen, game_state):
+        for row in range(self.rows):
+            for column in range(self.columns):
+                piece = game_state[row][column]
+                if piece == Game.CIRCLE:
+                    self.draw_circle(screen, row, column)
+                elif piece == Game.CROSS:
+                    self.draw_cross(screen, row, column)
+    
+    def draw_circle(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        pygame.draw.circle(screen, (0, 0, 255), (x, y), self.CIRCLE_RADIUS, self.CIRCLE_THICKNESS)
+    
+    def draw_cross(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        left_x = x - self.CROSS_SIZE
+        right_x = x + self.CROSS_SIZE
+        top_y = y - self.CROSS_SIZE
+        bottom_y = y + self.CROSS_SIZE
+        pygame.draw.line(screen, (255, 0, 0), (left_x, top_y), (right_x, bottom_y), self.CROSS_THICKNESS)
+        pygame.draw.line(screen, (255, 0, 0), (right_x, top_y), (left_x, bottom_y), self.CROSS_THICKNESS)
+    
+    def get_square_center_pos(self, row, column):
+        x = column * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        y = row * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        return (x, y)
+    
+    def mouse_to_grid_pos(self, mouse_x, mouse_y):
+        row = mouse_y // self.SQUARE_SIZE
+        row = min(row, self.rows - 1)
+        column = mouse_x // self.SQUARE_SIZE
+        column = min(column, self.columns - 1)
+        return (row, column)
+
+
+def find_forced_win(game, depth):
+    # Threat-space search: only moves that create a threat are tried, so the opponent has exactly
+    # one reply, blocking it. Returns the first move of a forced win or None.
+    attacker = Game.CIRCLE if game.players_turn else Game.CROSS
+    defender = Game.CROSS if game.players_turn else Game.CIRCLE
+    winning_squares = game.find_winning_squares(attacker)
+    if winning_squares:
+        return min(winning_squares)
+    if depth == 0:
+        return None
+    defender_winning_squares = game.find_winning_squares(defender)
+    if len(defender_winning_squares) > 1:
+        return None
+    if defender_winning_squares:
+        # The attacker has to block, the block only counts if it creates a threat as well.
+        candidate_moves = defender_winning_squares
+    else:
+        candidate_moves = game.find_threat_moves(attacker)
+    for move_row, move_column in sorted(candidate_moves):
+        game.make_move(move_row, move_column)
+        threats = game.find_winning_squares(attacker)
+        forced_win = False
+        if threats and not game.find_winning_squares(defender):
+            if len(threats) > 1:
+                # Two threats can not both be blocked.
+                forced_win = True
+            else:
+                block_row, block_column = threats.pop()
+                game.make_move(block_row, block_column)
+                forced_win = find_forced_win(game, depth - 1) is not None
+                game.undo_move(block_row, block_column)
+        game.undo_move(move_row, move_column)
+        if forced_win:
+            return (move_row, move_column)
+    return None
+
+def find_forced_move(game):
+    # Returns a move that has to be played and the reason, or (None, None).
+    own_piece = Game.CIRCLE if game.players_turn else Game.CROSS
+    opponent_piece = Game.CROSS if game.players_turn else Game.CIRCLE
+    winning_squares = game.find_winning_squares(own_piece)
+    if winning_squares:
+        return min(winning_squares), "win"
+    opponent_winning_squares = game.find_winning_squares(opponent_piece)
+    if opponent_winning_squares:
+        return min(opponent_winning_squares), "block"
+    move = find_forced_win(game, THREAT_SEARCH_DEPTH)
+    if move is not None:
+        return move, "threat sequence"
+    return None, None
+
+
+class SearchTimeout(Exception):
+    pass
+
+WIN_VALUE = 100000
+
+def evaluate(game):
+    # Windows without opponent pieces for the player to move minus those of the opponent,
+    # weighted by the number of own pieces in them. Kept up to date by make_move.
+    player = 0 if game.players_turn else 1
+    value = 0
+    for level in range(1, game.k):
+        value += 4 ** level * (len(game.open_windows[player][level]) - len(game.open_windows[1 - player][level]))
+    return value
+
+def search(game, time_limit):
+    # Iterative deepening: the best move of the last finished depth is used when the time is up.
+    global best_move, searched_nodes, deadline
+    searched_nodes = 0
+    deadline = time.perf_counter() + time_limit
+    search_move = None
+    evaluation = 0
+    for depth_limit in range(1, game.rows * game.columns - game.move_count + 1):
+        best_move = search_move
+        try:
+            value = minimax(game, -float("inf"), float("inf"), 0, depth_limit)
+        except SearchTimeout:
+            break
+        search_move = best_move
+        evaluation = value
+        if abs(value) > WIN_VALUE // 2:
+            break
+    return evaluation, search_move
+
+def minimax(game, alpha, beta, depth, depth_limit):
+    global best_move, searched_nodes
+    searched_nodes += 1
+    # The first depth is always finished so that there is a move to play.
+    if searched_nodes & 1023 == 0 and depth_limit > 1 and time.perf_counter() > deadline:
+        raise SearchTimeout()
+    if game.did_someone_win():
+        # Current player lost because the other player made the last move.
+        # Add move count to the evaluation because late losses are better than early losses.
+        return -WIN_VALUE + game.move_count
+    if game.board_full():
+        # Board is filled but no player won: Draw.
+        return 0
+    if depth == depth_limit:
+        return evaluate(game)
+    max_value = -float("inf")
+    legal_moves = game.find_nearby_moves()
+    if depth == 0 and best_move is not None:
+        # The best move of the last depth most likely is the best move again.
+        legal_moves.remove(best_move)
+        legal_moves.insert(0, best_move)
+    for move_row, move_column in legal_moves:
+        game.make_move(move_row, move_column)
+        value = -minimax(game, -beta, -alpha, depth+1, depth_limit)
+        game.undo_move(move_row, move_column)
+        if value > max_value:
+            max_value = value
+            if depth == 0:
+                best_move = (move_row, move_column)
+        if value > alpha:
+            alpha = value
+        if value >= beta:
+            break
+    return max_value
+
+def make_computer_move(game):
+    start_time = time.perf_counter()
+    move, reason = find_forced_move(game)
+    threat_statistics["computer moves"] += 1
+    threat_statistics["threat search time"] += time.perf_counter() - start_time
+    if move is not None:
+        threat_statistics[reason] += 1
+        print("Forced move: ", reason)
+    else:
+        evaluation, move = search(game, COMPUTER_TIME_LIMIT)
+        print("Evaluation: ", evaluation)
+        print("Searched nodes: ", searched_nodes)
+    game.make_move(*move)
+    short_circuits = threat_statistics["win"] + threat_statistics["block"] + threat_statistics["threat sequence"]
+    print("Moves without main search: ", short_circuits, "of", threat_statistics["computer moves"])
+    print("Threat statistics: ", threat_statistics)
+    print()
+    # Intercept inputs that happened while the computer was thinking.
+    pygame.event.get()
+
+
+ROWS = 9
+COLUMNS = 9
+K = 5
+THREAT_SEARCH_DEPTH = 6
+COMPUTER_TIME_LIMIT = 2
+
+threat_statistics = {"computer moves": 0, "win": 0, "block": 0, "threat sequence": 0, "threat search time": 0}
+
+WIN_SIZE = 600
+
+screen = pygame.display.set_mode((WIN_SIZE, WIN_SIZE))
+pygame.display.set_caption(f"Tic-Tac-Toe {ROWS}x{COLUMNS}, {K} in a row")
+
+FPS = 30
+clock = pygame.time.Clock()
+
+painter = GamePainter(WIN_SIZE, ROWS, COLUMNS)
+game = Game(False, ROWS, COLUMNS, K)
+
+game_over = False
+
+if not game.players_turn:
+    # Draw the board so that the window is not black while the computer is thinking.
+    screen.fill((255, 255, 255))
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    pygame.display.update()
+    
+    # Make the first computer move
+    make_computer_move(game)
+
+run = True
+while run:
+    clock.tick(FPS)
+    
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            run = False
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button != 1:
+                continue
+            
+            if game_over:
+                continue
+            
+            mouse_x, mouse_y = event.pos
+            row, column = painter.mouse_to_grid_pos(mouse_x, mouse_y)
+            if not game.is_move_legal(row, column):
+                continue
+            
+            game.make_move(row, column)
+            
+            if game.did_someone_win():
+                print("Player won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+            # Show the player's move while the computer is thinking.
+            screen.fill((255, 255, 255))
+            painter.draw_game_state(screen, game.state)
+            painter.draw_grid(screen)
+            pygame.display.update()
+            
+            make_computer_move(game)
+            
+            if game.did_someone_win():
+                print("Computer won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+    
+    screen.fill((255, 255, 255))
+    
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    
+    pygame.display.update()
+
+pygame.display.quit()
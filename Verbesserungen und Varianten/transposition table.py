@@ -0,0 +1,383 @@
+import random
+from array import array
+
+import pygame
+pygame.init()
+
+# Zobrist keys: one random 64 bit number per piece and square plus one for the side to move.
+zobrist_random = random.Random(0)
+ZOBRIST_PIECES = [[zobrist_random.getrandbits(64) for square in range(9)] for piece in range(3)]
+ZOBRIST_SIDE = zobrist_random.getrandbits(64)
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    def __init__(self, players_turn):
+        self.state = [[0, 0, 0],
+                      [0, 0, 0],
+                      [0, 0, 0]]
+        self.players_turn = players_turn
+        self.move_count = 0
+        self.hash = ZOBRIST_SIDE if players_turn else 0
+        
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        self.hash ^= ZOBRIST_PIECES[piece][row * 3 + column] ^ ZOBRIST_SIDE
+        
+    def undo_move(self, row, column):
+        piece = self.state[row][column]
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.move_count -= 1
+        self.hash ^= ZOBRIST_PIECES[piece][row * 3 + column] ^ ZOBRIST_SIDE
+        
+    def did_someone_win(self):
+        for i in range(3):
+            # Horizontal
+            if self.state[i][0] == self.state[i][1] == self.state[i][2] != 0:
+                return True
+            # Vertical
+            if self.state[0][i] == self.state[1][i] == self.state[2][i] != 0:
+                return True     
+        
+        # Diagonal
+        if self.state[0][0] == self.state[1][1] == self.state[2][2] != 0:
+            return True
+        if self.state[0][2] == self.state[1][1] == self.state[2][0] != 0:
+            return True
+        
+        return False
+        
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+    
+    def find_legal_moves(self):
+        legal_moves = []
+        for row in range(3):
+            for column in range(3):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        return legal_moves
+                
+    def board_full(self):
+        return self.move_count == 9
+
+
+class GamePainter:
+    
+    def __init__(self, win_size):
+        self.SQUARE_SIZE = win_size // 3
+        self.GRID_THICKNESS = win_size // 100
+        self.CIRCLE_THICKNESS = win_size // 35
+        self.CIRCLE_RADIUS = self.SQUARE_SIZE // 2.4
+        self.CROSS_THICKNESS = win_size // 27
+        self.CROSS_SIZE = self.SQUARE_SIZE // 3
+        
+    def draw_grid(self, screen):
+        for row in range(3):
+            for column in range(3):
+                x = column * self.SQUARE_SIZE
+                y = row * self.SQUARE_SIZE
+                pygame.draw.rect(screen, (0, 0, 0), 
+                                 (x, y, self.SQUARE_SIZE, self.SQUARE_SIZE), self.GRID_THICKNESS)
+                
+    def draw_game_state(self, screen, game_state):
+        for row in range(3):
+            for column in range(3):
+                piece = game_state[row][column]
+                if piece == Game.CIRCLE:
+                    self.draw_circle(screen, row, column)
+                elif piece == Game.CROSS:
+                    self.draw_cross(screen, row, column)
+                    
+    def draw_circle(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        pygame.draw.circle(screen, (0, 0, 255), (x, y), self.CIRCLE_RADIUS, self.CIRCLE_THICKNESS)
+        
+    def draw_cross(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        left_x = x - self.CROSS_SIZE
+        right_x = x + self.CROSS_SIZE
+        top_y = y - self.CROSS_SIZE
+        bottom_y = y + self.CROSS_SIZE
+        pygame.draw.line(screen, (255, 0, 0), (left_x, top_y), (right_x, bottom_y), self.CROSS_THICKNESS)
+        pygame.draw.line(screen, (255, 0, 0), (right_x, top_y), (left_x, bottom_y), self.CROSS_THICKNESS)
+        
+    def get_square_center_pos(self, row, column):
+        x = column * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        y = row * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        return (x, y)
+        
+    def mouse_to_grid_pos(self, mouse_x, mouse_y):
+        row = mouse_y // self.SQUARE_SIZE
+        row = min(row, 2)
+        column = mouse_x // self.SQUARE_SIZE
+        column = min(column, 2)
+        return (row, column)
+
+
+class TranspositionTable:
+    
+    DEPTH_PREFERRED = 0
+    ALWAYS_REPLACE = 1
+    # Buckets of two entries: the first one is depth-preferred, the second one is always replaced.
+    TWO_TIER = 2
+    
+    EMPTY = 0
+    EXACT = 1
+    LOWER_BOUND = 2
+    UPPER_BOUND = 3
+    
+    # 8 byte key plus one byte each for value, draft, bound flag and best move.
+    ENTRY_SIZE = 12
+    
+    def __init__(self, memory_budget, replacement_policy):
+        # Use the largest power of two that fits into the budget so that the index is a bit mask.
+        size = 2
+        while size * 2 * TranspositionTable.ENTRY_SIZE <= memory_budget:
+            size *= 2
+        self.size = size
+        self.replacement_policy = replacement_policy
+        if replacement_policy == TranspositionTable.TWO_TIER:
+            self.index_mask = size - 2
+        else:
+            self.index_mask = size - 1
+        self.keys = array("Q", [0]) * size
+        self.values = array("b", [0]) * size
+        self.drafts = array("B", [0]) * size
+        self.flags = array("B", [TranspositionTable.EMPTY]) * size
+        self.moves = array("b", [-1]) * size
+        self.reset_statistics()
+        self.filled = 0
+        
+    def reset_statistics(self):
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0
+        self.stores = 0
+        self.evictions = 0
+        
+    def clear(self):
+        for index in range(self.size):
+            self.flags[index] = TranspositionTable.EMPTY
+        self.filled = 0
+        self.reset_statistics()
+        
+    def probe(self, key):
+        # Returns the index of the entry for the key or -1.
+        self.probes += 1
+        index = key & self.index_mask
+        if self.flags[index] != TranspositionTable.EMPTY and self.keys[index] == key:
+            self.hits += 1
+            return index
+        collision = self.flags[index] != TranspositionTable.EMPTY
+        if self.replacement_policy == TranspositionTable.TWO_TIER:
+            index += 1
+            if self.flags[index] != TranspositionTable.EMPTY and self.keys[index] == key:
+                self.hits += 1
+                return index
+            collision = collision or self.flags[index] != TranspositionTable.EMPTY
+        if collision:
+            self.collisions += 1
+        return -1
+    
+    def store(self, key, draft, value, flag, move):
+        index = key & self.index_mask
+        occupied = self.flags[index] != TranspositionTable.EMPTY
+        self.stores += 1
+        if occupied and self.keys[index] != key and self.drafts[index] > draft:
+            if self.replacement_policy == TranspositionTable.DEPTH_PREFERRED:
+                # Keep the entry that saves more work.
+                return
+            if self.replacement_policy == TranspositionTable.TWO_TIER:
+                index += 1
+        elif self.replacement_policy == TranspositionTable.TWO_TIER:
+            # The new entry goes to the depth-preferred slot. A key is only ever in one slot of the bucket.
+            if self.flags[index + 1] != TranspositionTable.EMPTY and self.keys[index + 1] == key:
+                self.clear_entry(index + 1)
+            if occupied and self.keys[index] != key:
+                # The older entry moves to the always-replace slot instead of being lost.
+                self.write_entry(index + 1, self.keys[index], self.drafts[index], self.values[index],
+                                 self.flags[index], self.moves[index])
+                self.clear_entry(index)
+        self.write_entry(index, key, draft, value, flag, move)
+        
+    def write_entry(self, index, key, draft, value, flag, move):
+        if self.flags[index] == TranspositionTable.EMPTY:
+            self.filled += 1
+        elif self.keys[index] != key:
+            self.evictions += 1
+        self.keys[index] = key
+        self.values[index] = value
+        self.drafts[index] = draft
+        self.flags[index] = flag
+        self.moves[index] = move
+        
+    def clear_entry(self, index):
+        self.filled -= 1
+        self.flags[index] = TranspositionTable.EMPTY
+        
+    def statistics(self):
+        return {
+            "fill rate": self.filled / self.size,
+            "hit rate": self.hits / self.probes if self.probes else 0,
+            "collisions": self.collisions,
+            "evictions": self.evictions,
+        }
+
+
+def make_computer_move(game):
+    global best_move, searched_leaf_nodes
+    best_move = None
+    searched_leaf_nodes = 0
+    transposition_table.reset_statistics()
+    evaluation = minimax(game, float("-inf"), float("inf"), 0)
+    best_row, best_column = best_move
+    game.make_move(best_row, best_column)
+    print("Evaluation: ", evaluation)
+    print("Searched leaf nodes: ", searched_leaf_nodes)
+    for name, value in transposition_table.statistics().items():
+        print(f"Transposition table {name}: ", value)
+    print()
+    # Intercept inputs that happened while the computer was thinking.
+    pygame.event.get()
+
+def minimax(game, alpha, beta, depth):
+    global best_move, searched_leaf_nodes
+    if game.did_someone_win():
+        searched_leaf_nodes += 1
+        # Current player lost because the other player made the last move.
+        # Add move count to the evaluation because late losses are better than early losses.
+        return -100 + game.move_count
+    if game.board_full():
+        searched_leaf_nodes += 1
+        # Board is filled but no player won: Draw.
+        return 0
+    hash_move = -1
+    index = transposition_table.probe(game.hash)
+    if index >= 0:
+        hash_move = transposition_table.moves[index]
+        # Every entry comes from a search to the end of the game, so its draft is always sufficient.
+        # The root is always searched to find the best move.
+        if depth > 0:
+            value = transposition_table.values[index]
+            flag = transposition_table.flags[index]
+            if flag == TranspositionTable.EXACT:
+                return value
+            if flag == TranspositionTable.LOWER_BOUND:
+                alpha = max(alpha, value)
+            elif flag == TranspositionTable.UPPER_BOUND:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+    window_alpha = alpha
+    max_value = -float("inf")
+    legal_moves = game.find_legal_moves()
+    if hash_move >= 0:
+        # Search the best move of the previous search first, it most likely causes a cutoff.
+        legal_moves.remove(divmod(hash_move, 3))
+        legal_moves.insert(0, divmod(hash_move, 3))
+    for move_row, move_column in legal_moves:
+        game.make_move(move_row, move_column)
+        value = -minimax(game, -beta, -alpha, depth+1)
+        game.undo_move(move_row, move_column)
+        if value > max_value:
+            max_value = value
+            position_best_move = move_row * 3 + move_column
+            if depth == 0:
+                best_move = (move_row, move_column)
+        if value > alpha:
+            alpha = value
+        if value >= beta:
+            break
+    # The value is only exact if it lies inside the search window.
+    if max_value <= window_alpha:
+        flag = TranspositionTable.UPPER_BOUND
+    elif max_value >= beta:
+        flag = TranspositionTable.LOWER_BOUND
+    else:
+        flag = TranspositionTable.EXACT
+    transposition_table.store(game.hash, 9 - game.move_count, max_value, flag, position_best_move)
+    return max_value
+
+
+WIN_SIZE = 600
+
+screen = pygame.display.set_mode((WIN_SIZE, WIN_SIZE))
+pygame.display.set_caption("Tic-Tac-Toe")
+
+FPS = 30
+clock = pygame.time.Clock()
+
+painter = GamePainter(WIN_SIZE)
+
+TRANSPOSITION_TABLE_MEMORY = 64 * 1024
+transposition_table = TranspositionTable(TRANSPOSITION_TABLE_MEMORY, TranspositionTable.TWO_TIER)
+game = Game(False)
+
+game_over = False
+
+if not game.players_turn:
+    # Draw the board so that the window is not black while the computer is thinking.
+    screen.fill((255, 255, 255))
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    pygame.display.update()
+    
+    # Make the first computer move
+    make_computer_move(game)
+
+run = True
+while run:
+    clock.tick(FPS)
+    
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            run = False
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button != 1:
+                continue
+            
+            if game_over:
+                continue
+            
+            mouse_x, mouse_y = event.pos
+            row, column = painter.mouse_to_grid_pos(mouse_x, mouse_y)
+            if not game.is_move_legal(row, column):
+                continue
+            
+            game.make_move(row, column)
+            
+            if game.did_someone_win():
+                print("Player won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+            make_computer_move(game)
+            
+            if game.did_someone_win():
+                print("Computer won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+    screen.fill((255, 255, 255))
+    
+    painter.draw_game_state(screen, game.state)
+    painter.draw_grid(screen)
+    
+    pygame.display.update()
+    
+pygame.display.quit()
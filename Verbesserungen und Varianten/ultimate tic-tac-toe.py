@@ -0,0 +1,446 @@
+import math
+import random
+import time
+
+import pygame
+pygame.init()
+
+class Game:
+    
+    CIRCLE = 1
+    CROSS = 2
+    
+    def __init__(self, players_turn):
+        self.state = [[0, 0, 0],
+                      [0, 0, 0],
+                      [0, 0, 0]]
+        self.players_turn = players_turn
+        self.move_count = 0
+        
+    def make_move(self, row, column):
+        piece = Game.CIRCLE if self.players_turn else Game.CROSS
+        self.state[row][column] = piece
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        
+    def undo_move(self, row, column):
+        self.state[row][column] = 0
+        self.players_turn = not self.players_turn
+        self.move_count -= 1
+        
+    def did_someone_win(self):
+        for i in range(3):
+            # Horizontal
+            if self.state[i][0] == self.state[i][1] == self.state[i][2] != 0:
+                return True
+            # Vertical
+            if self.state[0][i] == self.state[1][i] == self.state[2][i] != 0:
+                return True     
+        
+        # Diagonal
+        if self.state[0][0] == self.state[1][1] == self.state[2][2] != 0:
+            return True
+        if self.state[0][2] == self.state[1][1] == self.state[2][0] != 0:
+            return True
+        
+        return False
+        
+    def is_move_legal(self, row, column):
+        return self.state[row][column] == 0
+    
+    def find_legal_moves(self):
+        legal_moves = []
+        for row in range(3):
+            for column in range(3):
+                if self.is_move_legal(row, column):
+                    legal_moves.append((row, column))
+        return legal_moves
+                
+    def board_full(self):
+        return self.move_count == 9
+
+
+class GamePainter:
+    
+    def __init__(self, win_size):
+        self.SQUARE_SIZE = win_size // 3
+        self.GRID_THICKNESS = win_size // 100
+        self.CIRCLE_THICKNESS = win_size // 35
+        self.CIRCLE_RADIUS = self.SQUARE_SIZE // 2.4
+        self.CROSS_THICKNESS = win_size // 27
+        self.CROSS_SIZE = self.SQUARE_SIZE // 3
+        
+    def draw_grid(self, screen):
+        for row in range(3):
+            for column in range(3):
+                x = column * self.SQUARE_SIZE
+                y = row * self.SQUARE_SIZE
+                pygame.draw.rect(screen, (0, 0, 0), 
+                                 (x, y, self.SQUARE_SIZE, self.SQUARE_SIZE), self.GRID_THICKNESS)
+                
+    def draw_game_state(self, screen, game_state):
+        for row in range(3):
+            for column in range(3):
+                piece = game_state[row][column]
+                if piece == Game.CIRCLE:
+                    self.draw_circle(screen, row, column)
+                elif piece == Game.CROSS:
+                    self.draw_cross(screen, row, column)
+                    
+    def draw_circle(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        pygame.draw.circle(screen, (0, 0, 255), (x, y), self.CIRCLE_RADIUS, self.CIRCLE_THICKNESS)
+        
+    def draw_cross(self, screen, row, column):
+        x, y = self.get_square_center_pos(row, column)
+        left_x = x - self.CROSS_SIZE
+        right_x = x + self.CROSS_SIZE
+        top_y = y - self.CROSS_SIZE
+        bottom_y = y + self.CROSS_SIZE
+        pygame.draw.line(screen, (255, 0, 0), (left_x, top_y), (right_x, bottom_y), self.CROSS_THICKNESS)
+        pygame.draw.line(screen, (255, 0, 0), (right_x, top_y), (left_x, bottom_y), self.CROSS_THICKNESS)
+        
+    def get_square_center_pos(self, row, column):
+        x = column * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        y = row * self.SQUARE_SIZE + self.SQUARE_SIZE // 2
+        return (x, y)
+        
+    def mouse_to_grid_pos(self, mouse_x, mouse_y):
+        row = mouse_y // self.SQUARE_SIZE
+        row = min(row, 2)
+        column = mouse_x // self.SQUARE_SIZE
+        column = min(column, 2)
+        return (row, column)
+
+
+class UltimateGame:
+    
+    # Nine Game boards in a meta board. The square of a move decides the board of the next move.
+    def __init__(self, players_turn):
+        self.boards = [Game(players_turn) for board in range(9)]
+        # The meta board holds the winner of every board.
+        self.meta = Game(players_turn)
+        self.players_turn = players_turn
+        self.forced_board = None
+        self.move_count = 0
+        
+    def make_move(self, board, row, column):
+        sub_game = self.boards[board]
+        sub_game.players_turn = self.players_turn
+        sub_game.make_move(row, column)
+        if sub_game.did_someone_win():
+            meta_row, meta_column = divmod(board, 3)
+            self.meta.players_turn = self.players_turn
+            self.meta.make_move(meta_row, meta_column)
+        next_board = row * 3 + column
+        self.forced_board = None if self.is_board_closed(next_board) else next_board
+        self.players_turn = not self.players_turn
+        self.move_count += 1
+        
+    def is_board_closed(self, board):
+        return self.boards[board].did_someone_win() or self.boards[board].board_full()
+    
+    def is_board_playable(self, board):
+        if self.forced_board is not None and board != self.forced_board:
+            return False
+        return not self.is_board_closed(board)
+    
+    def is_move_legal(self, board, row, column):
+        return self.is_board_playable(board) and self.boards[board].is_move_legal(row, column)
+    
+    def did_someone_win(self):
+        return self.meta.did_someone_win()
+    
+    def board_full(self):
+        return all(self.is_board_closed(board) for board in range(9))
+    
+    def pack(self):
+        state = UltimateState(self.players_turn)
+        for board in range(9):
+            for row in range(3):
+                for column in range(3):
+                    piece = self.boards[board].state[row][column]
+                    if piece != 0:
+                        state.pieces[piece - 1][board] |= 1 << (row * 3 + column)
+            if self.boards[board].did_someone_win():
+                meta_row, meta_column = divmod(board, 3)
+                winner = self.meta.state[meta_row][meta_column]
+                state.meta[winner - 1] |= 1 << board
+            if self.is_board_closed(board):
+                state.closed |= 1 << board
+        state.forced_board = -1 if self.forced_board is None else self.forced_board
+        return state
+
+
+# Packed boards: one 9 bit mask per player and board, bit row * 3 + column.
+FULL_MASK = 0x1FF
+WIN_MASKS = [0b000000111, 0b000111000, 0b111000000,
+             0b001001001, 0b010010010, 0b100100100,
+             0b100010001, 0b001010100]
+IS_WINNING_MASK = [any(mask & win_mask == win_mask for win_mask in WIN_MASKS) for mask in range(512)]
+EMPTY_SQUARES = [[square for square in range(9) if not occupied >> square & 1] for occupied in range(512)]
+
+class UltimateState:
+    
+    # Compact state for the search. Player index 0 is the circle, 1 the cross.
+    def __init__(self, players_turn):
+        self.pieces = [[0] * 9, [0] * 9]
+        self.meta = [0, 0]
+        # Boards that are won or full.
+        self.closed = 0
+        self.forced_board = -1
+        self.players_turn = players_turn
+        self.history = []
+        
+    def make_move(self, board, square):
+        player = 0 if self.players_turn else 1
+        self.history.append((board, square, self.forced_board, self.closed, self.meta[player]))
+        pieces = self.pieces[player][board] | 1 << square
+        self.pieces[player][board] = pieces
+        if IS_WINNING_MASK[pieces]:
+            self.meta[player] |= 1 << board
+            self.closed |= 1 << board
+        elif pieces | self.pieces[1 - player][board] == FULL_MASK:
+            self.closed |= 1 << board
+        self.forced_board = -1 if self.closed >> square & 1 else square
+        self.players_turn = not self.players_turn
+        
+    def undo_move(self):
+        board, square, self.forced_board, self.closed, meta = self.history.pop()
+        self.players_turn = not self.players_turn
+        player = 0 if self.players_turn else 1
+        self.pieces[player][board] &= ~(1 << square)
+        self.meta[player] = meta
+        
+    def did_someone_win(self):
+        # Only the player who made the last move can have won.
+        last_player = 1 if self.players_turn else 0
+        return IS_WINNING_MASK[self.meta[last_player]]
+    
+    def board_full(self):
+        return self.closed == FULL_MASK
+    
+    def game_over(self):
+        return self.did_someone_win() or self.closed == FULL_MASK
+    
+    def find_legal_moves(self):
+        if self.forced_board >= 0:
+            boards = (self.forced_board,)
+        else:
+            boards = EMPTY_SQUARES[self.closed]
+        circles, crosses = self.pieces
+        return [(board, square) for board in boards for square in EMPTY_SQUARES[circles[board] | crosses[board]]]
+
+
+class UltimateGamePainter(GamePainter):
+    
+    # Small pieces are drawn on the 9x9 grid, won boards get one big piece of the meta painter.
+    def __init__(self, win_size):
+        super().__init__(win_size // 3)
+        self.BOARD_SIZE = win_size // 3
+        self.BOARD_THICKNESS = win_size // 100
+        self.meta_painter = GamePainter(win_size)
+        
+    def draw_grid(self, screen):
+        for row in range(9):
+            for column in range(9):
+                x = column * self.SQUARE_SIZE
+                y = row * self.SQUARE_SIZE
+                pygame.draw.rect(screen, (0, 0, 0),
+                                 (x, y, self.SQUARE_SIZE, self.SQUARE_SIZE), self.GRID_THICKNESS)
+        for board in range(9):
+            x, y = self.get_board_pos(board)
+            pygame.draw.rect(screen, (0, 0, 0),
+                             (x, y, self.BOARD_SIZE, self.BOARD_SIZE), self.BOARD_THICKNESS)
+            
+    def draw_playable_boards(self, screen, game):
+        for board in range(9):
+            if game.is_board_playable(board):
+                x, y = self.get_board_pos(board)
+                pygame.draw.rect(screen, (255, 255, 200), (x, y, self.BOARD_SIZE, self.BOARD_SIZE))
+                
+    def draw_game_state(self, screen, game):
+        for board in range(9):
+            board_row, board_column = divmod(board, 3)
+            for row in range(3):
+                for column in range(3):
+                    piece = game.boards[board].state[row][column]
+                    if piece == Game.CIRCLE:
+                        self.draw_circle(screen, board_row * 3 + row, board_column * 3 + column)
+                    elif piece == Game.CROSS:
+                        self.draw_cross(screen, board_row * 3 + row, board_column * 3 + column)
+        self.meta_painter.draw_game_state(screen, game.meta.state)
+        
+    def get_board_pos(self, board):
+        board_row, board_column = divmod(board, 3)
+        return (board_column * self.BOARD_SIZE, board_row * self.BOARD_SIZE)
+    
+    def mouse_to_grid_pos(self, mouse_x, mouse_y):
+        row = min(mouse_y // self.SQUARE_SIZE, 8)
+        column = min(mouse_x // self.SQUARE_SIZE, 8)
+        board = row // 3 * 3 + column // 3
+        return (board, row % 3, column % 3)
+
+
+class SearchNode:
+    
+    def __init__(self, parent, move, players_move, untried_moves):
+        self.parent = parent
+        self.move = move
+        # Whether the player (circle) made the move that leads to this node.
+        self.players_move = players_move
+        self.untried_moves = untried_moves
+        self.children = []
+        self.visits = 0
+        self.wins = 0
+        
+    def select_child(self):
+        # UCT: balance the win rate of a child against how rarely it was visited.
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+
+EXPLORATION = 1.4
+
+def monte_carlo_tree_search(state, time_limit):
+    # Returns the most visited move and the number of playouts.
+    root = SearchNode(None, None, not state.players_turn, state.find_legal_moves())
+    deadline = time.perf_counter() + time_limit
+    playouts = 0
+    while playouts == 0 or time.perf_counter() < deadline:
+        node = root
+        made_moves = 0
+        # Selection
+        while not node.untried_moves and node.children:
+            node = node.select_child()
+            state.make_move(*node.move)
+            made_moves += 1
+        # Expansion
+        if node.untried_moves:
+            move = node.untried_moves.pop(random.randrange(len(node.untried_moves)))
+            players_move = state.players_turn
+            state.make_move(*move)
+            made_moves += 1
+            untried_moves = [] if state.game_over() else state.find_legal_moves()
+            child = SearchNode(node, move, players_move, untried_moves)
+            node.children.append(child)
+            node = child
+        # Playout
+        while not state.game_over():
+            state.make_move(*random.choice(state.find_legal_moves()))
+            made_moves += 1
+        player_won = not state.players_turn if state.did_someone_win() else None
+        for i in range(made_moves):
+            state.undo_move()
+        # Backpropagation: every node counts the wins of the player who made its move.
+        while node is not None:
+            node.visits += 1
+            if player_won is None:
+                node.wins += 0.5
+            elif node.players_move == player_won:
+                node.wins += 1
+            node = node.parent
+        playouts += 1
+    best_child = max(root.children, key=lambda child: child.visits)
+    return best_child.move, best_child.wins / best_child.visits, playouts
+
+def make_computer_move(game):
+    state = game.pack()
+    start_time = time.perf_counter()
+    (board, square), win_rate, playouts = monte_carlo_tree_search(state, COMPUTER_TIME_LIMIT)
+    elapsed = time.perf_counter() - start_time
+    row, column = divmod(square, 3)
+    game.make_move(board, row, column)
+    print("Win rate: ", round(win_rate, 3))
+    print("Playouts: ", playouts)
+    print("Playouts per second: ", round(playouts / elapsed))
+    print()
+    # Intercept inputs that happened while the computer was thinking.
+    pygame.event.get()
+
+
+COMPUTER_TIME_LIMIT = 2
+
+WIN_SIZE = 600
+
+screen = pygame.display.set_mode((WIN_SIZE, WIN_SIZE))
+pygame.display.set_caption("Ultimate Tic-Tac-Toe")
+
+FPS = 30
+clock = pygame.time.Clock()
+
+painter = UltimateGamePainter(WIN_SIZE)
+game = UltimateGame(False)
+
+game_over = False
+
+if not game.players_turn:
+    # Draw the board so that the window is not black while the computer is thinking.
+    screen.fill((255, 255, 255))
+    painter.draw_playable_boards(screen, game)
+    painter.draw_game_state(screen, game)
+    painter.draw_grid(screen)
+    pygame.display.update()
+    
+    # Make the first computer move
+    make_computer_move(game)
+
+run = True
+while run:
+    clock.tick(FPS)
+    
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            run = False
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button != 1:
+                continue
+            
+            if game_over:
+                continue
+            
+            mouse_x, mouse_y = event.pos
+            board, row, column = painter.mouse_to_grid_pos(mouse_x, mouse_y)
+            if not game.is_move_legal(board, row, column):
+                continue
+            
+            game.make_move(board, row, column)
+            
+            if game.did_someone_win():
+                print("Player won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+            # Show the player's move while the computer is thinking.
+            screen.fill((255, 255, 255))
+            painter.draw_playable_boards(screen, game)
+            painter.draw_game_state(screen, game)
+            painter.draw_grid(screen)
+            pygame.display.update()
+            
+            make_computer_move(game)
+            
+            if game.did_someone_win():
+                print("Computer won!")
+                game_over = True
+                continue
+            if game.board_full():
+                game_over = True
+                print("Draw!")
+                continue
+            
+    screen.fill((255, 255, 255))
+    
+    if not game_over:
+        painter.draw_playable_boards(screen, game)
+    painter.draw_game_state(screen, game)
+    painter.draw_grid(screen)
+    
+    pygame.display.update()
+    
+pygame.display.quit()